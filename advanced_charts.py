@@ -1,96 +1,92 @@
 # %%
-import json
-import re
+import typing
+from collections.abc import Callable, Collection, Mapping
 from pathlib import Path
+from typing import Any
 
-import altair as alt
 import polars as pl
-from IPython.display import display
 
-# %%
-OUTPUT_PATH = Path("output/")
-
-
-# %%
-def _extract_question_choice_id(full_column_name: str) -> str | None:
-    m = re.match(r"^(q[0-9]{2}(\[.*\])?)\..+", full_column_name)
-    if m is None:
-        return None
-    return m.group(1)
-
-
-assert _extract_question_choice_id("q01. Where do you live?") == "q01"
-assert (
-    _extract_question_choice_id(
-        "q12[SQ001]. Which user types do you identify with? Select all that apply   \tType A: You love the idea behind Nix or NixOS.Maybe you spread the word among friends and coworkers.Maybe you are interested in or enthusiastic about any of the following: \t \t\tFree and open source software \t\tLinux \t\tHome automation \t\tOnline communities \t\tDistro-hopping \t \t \tType B. You’re here because you’re curious about Nix and how it works.Maybe you enjoy or want to learn functional programming, or you just want to learn new things.Maybe you identify yourself as: \t \t\tNix-curious developer \t\tStudent of a technical field \t\tEducator \t\tAcademic researcher \t \t \tType C: You use Nix or NixOS to get things done or boost your team’s productivity, you learn it to grow your career opportunities, or you have to use it on the job because someone said so.Maybe you identify yourself as: \t \t\tSystem administrator \t\tEmployee developer \t\tDevOps engineer \t\tNatural scientist \t\tOpen source software author \t\tEarly-career professional \t \t \tType D: You work or want to work on the Nix ecosystem rather than just with it.You are at least one of the following: \t \t\tAspiring contributor \t\tNovice contributor \t\tDrive-by contributor \t\tPackage maintainer \t\tCode owner \t\tCommunity team member \t\tSponsor \t \t \tType E: You make the strategic decisions for your team or company: which technologies to adopt, which skills to train your employees in, which projects to support or invest in, which services or products to offer.Maybe you’re a: \t \t\tEntrepreneur \t\tTeam lead \t\tSoftware architect \t\tCTO \t\tSales executive \t\tPublic service administrator \t \t   [A. I love the idea behind Nix]"
-    )
-    == "q12[SQ001]"
+from associations import compute_associations, plot_associations
+from build_cache import BuildCache
+from confidence import add_intervals
+from crosstab import crosstab
+from data_quality import load_clean_responses
+from editions import EDITION_COLUMN, load_editions, read_editions
+from output_store import (
+    OUTPUT_MODES,
+    DatasetStore,
+    chart_job,
+    has_answers,
+    is_selected,
+    segment_path,
+    write_answers,
 )
-df = pl.read_csv("./data/results-survey2024.csv")
-original_columns = df.columns.copy()
-df = df.rename(
-    {
-        full_column_name: column_name
-        for full_column_name in df.columns
-        if (column_name := _extract_question_choice_id(full_column_name)) is not None
-    }
+from profiling import profiler
+from render import RENDER_FORMATS, RENDER_WORKERS, RenderJob, render_charts
+from survey_plan import SurveyPlan, load_survey_plan
+from weighting import (
+    WEIGHT_COLUMN,
+    add_weights,
+    design_effects,
+    read_targets,
+    weighted_len,
 )
-df = df.with_columns(
-    pl.when(pl.col(pl.String).str.len_chars() == 0)
-    .then(pl.lit("Not answered"))
-    .otherwise(pl.col(pl.String))
-    .name.keep()
-)
-df.head(3)
 
-del _extract_question_choice_id
+if typing.TYPE_CHECKING:
+    import altair as alt
+
+# %%
+OUTPUT_PATH = Path("output/")
 
 
 # %%
-with open("data/survey.json") as f:
-    survey = json.load(f)
+def load_data(
+    survey_path: Path | str = "data/survey.json",
+    csv_path: Path | str = "./data/results-survey2024.csv",
+    editions_path: Path | str | None = None,
+    weights_path: Path | str | None = None,
+) -> tuple[SurveyPlan, pl.LazyFrame]:
+    # with `editions_path`, the responses of all editions it lists, with their
+    # `edition`, instead of the ones of `csv_path`
+    if editions_path is not None:
+        plan, df = load_editions(read_editions(editions_path))
+    else:
+        plan = load_survey_plan(survey_path, csv_path)
+
+        # scanned lazily from the memory-mapped cache of the submitted responses
+        # that pass the data quality checks, shared with basic_charts, which
+        # already has the short column names and NOT_ANSWERED: every crosstab below
+        # only reads the columns it groups on
+        df = load_clean_responses(plan, csv_path)
+    # with `weights_path`, the raking weight of each respondent, by edition
+    if weights_path is not None:
+        by = None if editions_path is None else EDITION_COLUMN
+        df = add_weights(plan, df, read_targets(weights_path), by)
+    return plan, df
 
 
-def get_question(column_name: str) -> dict | None:
-    m = re.match(r"(q[0-9]{2})", column_name)
-    if m is None:
+# %%
+def get_question(plan: SurveyPlan, column_name: str) -> Mapping[str, Any] | None:
+    q = plan.question(column_name)
+    if q is None:
         return None
 
-    q_id = m.group(1)
-    for question in survey["questions"]:
-        if question["id"] == q_id:
-            return question
+    return q.question
 
-    return None
 
-
-def get_question_prompt(column_name: str) -> str | None:
-    q = get_question(column_name)
-    if not q:
+def get_question_prompt(plan: SurveyPlan, column_name: str) -> str | None:
+    q = plan.question(column_name)
+    if q is None:
         return None
 
-    return q["prompt"]
-
-
-assert get_question_prompt("q01") == "Where do you live?"
+    return q.prompt
 
 
 def get_choice_text(
+    plan: SurveyPlan,
     column_name: str,
 ) -> str | None:
-    q = get_question(column_name)
-    if not q:
-        return None
-
-    m = re.match(r"q[0-9]{2}\[SQ([0-9]{3})\]", column_name)
-    if m is None:
-        return None
-    c_id = int(m.group(1)) - 1
-
-    return q["choices"][c_id]
-
-
-assert get_choice_text("q07[SQ003]") == "I use NixOS"
+    return plan.choice_text(column_name)
 
 
 # %%
@@ -98,199 +94,403 @@ def save_output(
     table,
     chart,
     code,
+    cache: BuildCache,
     output_path: Path = OUTPUT_PATH,
-):
-    output_path.mkdir(parents=True, exist_ok=True)
-
-    answers_path = output_path / f"answers_{code}.json"
-    with open(answers_path, "w") as f:
-        json.dump(obj=table.to_dicts(), fp=f)
+    formats: tuple[str, ...] = RENDER_FORMATS,
+    scale_factor: float = 3,
+    store: DatasetStore | None = None,
+) -> RenderJob | None:
+    # unchanged tables and charts are not written nor rendered again
+    answers_key = cache.key(table.to_dicts())
+    if not cache.is_fresh("answers", code, answers_key) or not has_answers(
+        code, output_path, store
+    ):
+        with profiler.stage("write_answers", code):
+            answers_file = write_answers(table, code, output_path, store)
+        cache.store("answers", code, answers_key, [answers_file])
+
+    # rendered all at once by `run`
+    with profiler.stage("chart_spec", code):
+        job = chart_job(code, chart, output_path, store)
+    if cache.is_fresh("chart", code, cache.chart_key(job, formats, scale_factor)):
+        return None
+    return job
 
-    chart_plot_path = output_path / f"chart_plot_{code}.png"
-    with open(chart_plot_path, "wb") as f:
-        chart.save(fp=f, format="png", scale_factor=3)
 
-    chart_json_path = output_path / f"chart_json_{code}.json"
-    with open(chart_json_path, "w") as f:
-        chart.save(fp=f, format="json")
+# +
+def table_q08_q07sq003(
+    plan: SurveyPlan,
+    df: pl.LazyFrame,
+    by: str | None = None,
+    weight: str | None = None,
+) -> pl.DataFrame:
+    keys = [] if by is None else [by]
+    return (
+        df.group_by(*keys, "q07[SQ003]", "q08")
+        .agg(weighted_len(weight).alias("count"))
+        .collect()
+    )
 
 
-# +
-q08_q07sq003 = df.group_by("q07[SQ003]", "q08").agg(pl.len().alias("count"))
-display(q08_q07sq003)
-
-"""
-Now the question is: does the proportion of NixOS usage evolve through the years?
-"""
-
-chart_q08_q07sq003 = (
-    alt.Chart(
-        q08_q07sq003.filter(pl.col("q07[SQ003]") == "Yes")
-        .select("q08", pl.col("count").alias("count_yes"))
-        .join(
-            q08_q07sq003.group_by("q08").agg(
-                pl.col("count").sum().alias("count_total")
-            ),
-            on="q08",
+def chart_q08_q07sq003(
+    plan: SurveyPlan, q08_q07sq003: pl.DataFrame
+) -> "alt.Chart | alt.LayerChart":
+    import altair as alt
+
+    bounds = [c for c in ("percentage_lower", "percentage_upper") if c in q08_q07sq003]
+    # Now the question is: does the proportion of NixOS usage evolve through the
+    # years?
+    chart = (
+        alt.Chart(
+            q08_q07sq003.filter(pl.col("q07[SQ003]") == "Yes")
+            .select(
+                "q08",
+                pl.col("count").alias("count_yes"),
+                *(pl.col(bound) * 100 for bound in bounds),
+            )
+            .join(
+                q08_q07sq003.group_by("q08").agg(
+                    pl.col("count").sum().alias("count_total")
+                ),
+                on="q08",
+            )
+            .select(
+                "q08",
+                (pl.col("count_yes") / pl.col("count_total") * 100).alias(
+                    "percent_yes"
+                ),
+                *bounds,
+            )
         )
-        .select(
-            "q08",
-            (pl.col("count_yes") / pl.col("count_total") * 100).alias("percent_yes"),
+        .mark_bar()
+        .encode(
+            x=alt.X("q08", title=get_question_prompt(plan, "q08")).sort(
+                (get_question(plan, "q08") or {}).get("choices")
+            ),
+            y=alt.Y("percent_yes", title="Use NixOS (%)"),
         )
     )
-    .mark_bar()
-    .encode(
-        x=alt.X("q08", title=get_question_prompt("q08")).sort(
-            (get_question("q08") or {}).get("choices")
-        ),
-        y=alt.Y("percent_yes", title="Use NixOS (%)"),
-    )
-)
+    if bounds:
+        chart += chart.mark_rule(color="black").encode(
+            y="percentage_lower:Q", y2="percentage_upper:Q"
+        )
+    return chart
 
-display(chart_q08_q07sq003)
 
-save_output(code="q08_q07sq003", table=q08_q07sq003, chart=chart_q08_q07sq003)
+def _interval_tooltip(table: pl.DataFrame):
+    # the confidence interval of each cell of a crosstab, when computed
+    import altair as alt
+
+    if "percentage_lower" not in table.columns:
+        return alt.Undefined
+    return [*table.columns[:2], "count", "percentage_lower", "percentage_upper"]
 
 
 # %%
-q08_q09 = df.group_by("q09", "q08").agg(pl.len().alias("count"))
-display(q08_q09)
+def table_q08_q09(
+    plan: SurveyPlan,
+    df: pl.LazyFrame,
+    by: str | None = None,
+    weight: str | None = None,
+) -> pl.DataFrame:
+    return crosstab(plan, df, "q08", "q09", by, weight)
+
+
+def chart_q08_q09(plan: SurveyPlan, q08_q09: pl.DataFrame) -> "alt.Chart":
+    import altair as alt
+
+    # Now the question is: does the self-evaluated skill level with Nix evolve
+    # through the years?
+    return (
+        alt.Chart(
+            q08_q09,
+            title="Percentage of self-evaluated skill level with Nix, normalized by years of Nix experience",
+        )
+        .transform_joinaggregate(total="sum(count)", groupby=["q08"])
+        .transform_calculate(frac=alt.datum.count / alt.datum.total * 100)
+        .mark_rect()
+        .encode(
+            tooltip=_interval_tooltip(q08_q09),
+            x=alt.X("q08", title=get_question_prompt(plan, "q08")).sort(
+                (get_question(plan, "q08") or {}).get("choices")
+            ),
+            y=alt.Y("q09", title=get_question_prompt(plan, "q09")).sort(
+                (get_question(plan, "q09") or {}).get("choices")
+            ),
+            color=alt.Color(
+                "frac:Q", scale=alt.Scale(domain=[0, 100]), title="Percentage"
+            ),
+        )
+    )
 
-"""
-Now the question is: does the self-evaluated skill level with Nix evolve through the years?
-"""
 
-chart_q08_q09 = (
-    alt.Chart(
-        q08_q09,
-        title="Percentage of self-evaluated skill level with Nix, normalized by years of Nix experience",
-    )
-    .transform_joinaggregate(total="sum(count)", groupby=["q08"])
-    .transform_calculate(frac=alt.datum.count / alt.datum.total * 100)
-    .mark_rect()
-    .encode(
-        x=alt.X("q08", title=get_question_prompt("q08")).sort(
-            (get_question("q08") or {}).get("choices")
-        ),
-        y=alt.Y("q09", title=get_question_prompt("q09")).sort(
-            (get_question("q09") or {}).get("choices")
-        ),
-        color=alt.Color("frac:Q", scale=alt.Scale(domain=[0, 100]), title="Percentage"),
+# %%
+def table_q08_q11(
+    plan: SurveyPlan,
+    df: pl.LazyFrame,
+    by: str | None = None,
+    weight: str | None = None,
+) -> pl.DataFrame:
+    return crosstab(plan, df, "q08", "q11", by, weight)
+
+
+def chart_q08_q11(plan: SurveyPlan, q08_q11: pl.DataFrame) -> "alt.Chart":
+    import altair as alt
+
+    return (
+        alt.Chart(
+            q08_q11,
+            title="Percentage of medium from which people discovered Nix, normalized by years of Nix experience",
+        )
+        .transform_joinaggregate(total="sum(count)", groupby=["q08"])
+        .transform_calculate(frac=alt.datum.count / alt.datum.total * 100)
+        .mark_rect()
+        .encode(
+            tooltip=_interval_tooltip(q08_q11),
+            x=alt.X("q08", title=get_question_prompt(plan, "q08")).sort(
+                (get_question(plan, "q08") or {}).get("choices")
+            ),
+            y=alt.Y("q11", title=get_question_prompt(plan, "q11")).sort(
+                (get_question(plan, "q11") or {}).get("choices")
+            ),
+            color=alt.Color("frac:Q"),
+        )
     )
-)
-
-display(chart_q08_q09)
 
-save_output(code="q08_q09", table=q08_q09, chart=chart_q08_q09)
 
 # %%
-q08_q11 = df.group_by("q11", "q08").agg(pl.len().alias("count"))
-display(q08_q11)
-
-chart_q08_q11 = (
-    alt.Chart(
-        q08_q11,
-        title="Percentage of medium from which people discovered Nix, normalized by years of Nix experience",
-    )
-    .transform_joinaggregate(total="sum(count)", groupby=["q08"])
-    .transform_calculate(frac=alt.datum.count / alt.datum.total * 100)
-    .mark_rect()
-    .encode(
-        x=alt.X("q08", title=get_question_prompt("q08")).sort(
-            (get_question("q08") or {}).get("choices")
-        ),
-        y=alt.Y("q11", title=get_question_prompt("q11")).sort(
-            (get_question("q11") or {}).get("choices")
-        ),
-        color=alt.Color("frac:Q"),
+def table_q08_q14(
+    plan: SurveyPlan,
+    df: pl.LazyFrame,
+    by: str | None = None,
+    weight: str | None = None,
+) -> pl.DataFrame:
+    return crosstab(plan, df, "q08", "q14", by, weight).rename({"q14": "variable"})
+
+
+def chart_q08_q14(plan: SurveyPlan, q08_q14: pl.DataFrame) -> "alt.LayerChart":
+    import altair as alt
+
+    chart = (
+        alt.Chart(
+            q08_q14,
+            title="Count of usage of Nix installer normalized by years of Nix experience",
+        )
+        .transform_joinaggregate(total="sum(count)", groupby=["q08"])
+        .transform_calculate(frac=alt.datum.count / alt.datum.total)
+        .encode(
+            tooltip=_interval_tooltip(q08_q14),
+            x=alt.X("q08", title=get_question_prompt(plan, "q08")).sort(
+                (get_question(plan, "q08") or {}).get("choices")
+            ),
+            y=alt.Y("variable", title=get_question_prompt(plan, "q14")),
+            text=alt.Text("frac:Q", format=".0%"),
+        )
     )
-)
+    return chart.encode(
+        color=alt.Color("frac:Q", title="Percentage", scale=alt.Scale(domain=[0, 1]))
+    ).mark_rect() + chart.mark_text(size=5, color="black")
 
-display(chart_q08_q11)
 
-save_output(code="q08_q11", table=q08_q11, chart=chart_q08_q11)
+# %%
+def table_q08_q18(
+    plan: SurveyPlan,
+    df: pl.LazyFrame,
+    by: str | None = None,
+    weight: str | None = None,
+) -> pl.DataFrame:
+    return crosstab(plan, df, "q08", "q18", by, weight).rename({"q18": "variable"})
+
+
+def chart_q08_q18(plan: SurveyPlan, q08_q18: pl.DataFrame) -> "alt.LayerChart":
+    import altair as alt
+
+    chart = (
+        alt.Chart(
+            q08_q18,
+            title="Count of usage of Nix installer normalized by years of Nix experience",
+        )
+        .transform_joinaggregate(total="sum(count)", groupby=["q08"])
+        .transform_calculate(frac=alt.datum.count / alt.datum.total)
+        .encode(
+            tooltip=_interval_tooltip(q08_q18),
+            x=alt.X("q08", title=get_question_prompt(plan, "q08")).sort(
+                (get_question(plan, "q08") or {}).get("choices")
+            ),
+            y=alt.Y("variable", title=get_question_prompt(plan, "q18")),
+            text=alt.Text("frac:Q", format=".0%"),
+        )
+    )
+    return chart.encode(
+        color=alt.Color("frac:Q", title="Percentage", scale=alt.Scale(domain=[0, 1]))
+    ).mark_rect() + chart.mark_text(size=5, color="black")
 
 
 # %%
-def reduce_join(dfs: list[pl.DataFrame], on: str | list[str]) -> pl.DataFrame:
-    result = dfs[0]
-    for df in dfs[1:]:
-        result = result.join(df, on=on, how="left")
-    return result
-
-
-q14_choices = (get_question("q14") or {})["choices"]
-q14_choices_cols = [f"q14[SQ{i+1:03}]" for i in range(len(q14_choices))]
-q08_q14 = df.group_by("q08", *q14_choices_cols).agg(pl.len().alias("count"))
-q08_q14 = reduce_join(
-    [
-        q08_q14.filter(pl.col(col) == "Yes")
-        .group_by("q08")
-        .agg(pl.sum("count").alias(choice))
-        for choice, col in zip(q14_choices, q14_choices_cols)
-    ],
-    on="q08",
-).unpivot(index="q08", value_name="count")
-display(q08_q14)
-
-chart_q08_q14 = (
-    alt.Chart(
-        q08_q14,
-        title="Count of usage of Nix installer normalized by years of Nix experience",
+def table_associations(
+    plan: SurveyPlan,
+    df: pl.LazyFrame,
+    by: str | None = None,
+    weight: str | None = None,
+) -> pl.DataFrame:
+    # every pair of single questions, ranked by Cramér's V. The tests are on
+    # respondents, whatever their weight
+    if by is None:
+        return compute_associations(plan.questions.values(), df)
+    values = df.select(pl.col(by).unique().sort()).collect()[by]
+    return pl.concat(
+        compute_associations(
+            plan.questions.values(), df.filter(pl.col(by) == value)
+        ).select(pl.lit(value).alias(by), pl.all())
+        for value in values
     )
-    .transform_joinaggregate(total="sum(count)", groupby=["q08"])
-    .transform_calculate(frac=alt.datum.count / alt.datum.total)
-    .encode(
-        x=alt.X("q08", title=get_question_prompt("q08")).sort(
-            (get_question("q08") or {}).get("choices")
-        ),
-        y=alt.Y("variable", title=get_question_prompt("q14")),
-        text=alt.Text("frac:Q", format=".0%"),
-    )
-)
-chart_q08_q14 = chart_q08_q14.encode(
-    color=alt.Color("frac:Q", title="Percentage", scale=alt.Scale(domain=[0, 1]))
-).mark_rect() + chart_q08_q14.mark_text(size=5, color="black")
 
-display(chart_q08_q14)
 
-save_output(code="q08_q14", table=q08_q14, chart=chart_q08_q14)
+def chart_associations(
+    plan: SurveyPlan, associations: pl.DataFrame
+) -> "alt.LayerChart":
+    return plot_associations(associations)
 
 
 # %%
-q18_choices = (get_question("q18") or {})["choices"]
-q18_choices_cols = [f"q18[SQ{i+1:03}]" for i in range(len(q18_choices))]
-q08_q18 = df.group_by("q08", *q18_choices_cols).agg(pl.len().alias("count"))
-q08_q18 = reduce_join(
-    [
-        q08_q18.filter(pl.col(col) == "Yes")
-        .group_by("q08")
-        .agg(pl.sum("count").alias(choice))
-        for choice, col in zip(q18_choices, q18_choices_cols)
-    ],
-    on="q08",
-).unpivot(index="q08", value_name="count")
-display(q08_q18)
-
-chart_q08_q18 = (
-    alt.Chart(
-        q08_q18,
-        title="Count of usage of Nix installer normalized by years of Nix experience",
-    )
-    .transform_joinaggregate(total="sum(count)", groupby=["q08"])
-    .transform_calculate(frac=alt.datum.count / alt.datum.total)
-    .encode(
-        x=alt.X("q08", title=get_question_prompt("q08")).sort(
-            (get_question("q08") or {}).get("choices")
-        ),
-        y=alt.Y("variable", title=get_question_prompt("q18")),
-        text=alt.Text("frac:Q", format=".0%"),
+# table and chart of each output, by code
+CHARTS: dict[str, tuple[Callable, Callable]] = {
+    "q08_q07sq003": (table_q08_q07sq003, chart_q08_q07sq003),
+    "q08_q09": (table_q08_q09, chart_q08_q09),
+    "q08_q11": (table_q08_q11, chart_q08_q11),
+    "q08_q14": (table_q08_q14, chart_q08_q14),
+    "q08_q18": (table_q08_q18, chart_q08_q18),
+    "associations": (table_associations, chart_associations),
+}
+
+
+def run(
+    only: Collection[str] | None = None,
+    formats: tuple[str, ...] = RENDER_FORMATS,
+    scale_factor: float = 3,
+    workers: int = RENDER_WORKERS,
+    output_path: Path = OUTPUT_PATH,
+    output_mode: str = "files",
+    intervals: str | None = None,
+    editions_path: Path | str | None = None,
+    weights_path: Path | str | None = None,
+    show: bool = False,
+):
+    """Write the tables and charts of `CHARTS`, or of the `only` ones.
+
+    In the "store" output mode, all tables go to a single
+    `datasets_advanced_charts.ndjson` which the JSON chart specs refer to. With
+    `intervals` ("wilson" or "bootstrap"), the percentage of each cell among its
+    `q08` group gets a confidence interval. With `editions_path`, each table is
+    counted by edition in one pass, and the outputs of each edition are written
+    under `output/edition/<name>/`. With `weights_path`, the respondents are
+    weighted to the population shares it lists (see `weighting.add_weights`),
+    and the crosstabs are sums of weights. With `show`, each table and chart is
+    also displayed, as in a notebook.
+    """
+    assert output_mode in OUTPUT_MODES, f"Unknown output mode {output_mode}"
+    with profiler.stage("load"):
+        plan, df = load_data(editions_path=editions_path, weights_path=weights_path)
+
+    if show:
+        from IPython.display import display
+
+    by = None if editions_path is None else EDITION_COLUMN
+    weight = None if weights_path is None else WEIGHT_COLUMN
+    tables: dict[tuple[str | None, str], pl.DataFrame] = {}
+    for code, (table_fn, _) in CHARTS.items():
+        if is_selected(code, only):
+            with profiler.stage("crosstab", code):
+                table = table_fn(plan, df, by, weight)
+            if by is None:
+                tables[None, code] = table
+            else:
+                for (edition,), edition_table in table.partition_by(
+                    by, as_dict=True, include_key=False
+                ).items():
+                    tables[edition, code] = edition_table
+    if intervals is not None:
+        # all the crosstabs are normalized by years of Nix experience, and weighted
+        # counts are worth fewer respondents, by edition
+        with profiler.stage("intervals"):
+            effects = {} if weight is None else design_effects(df, weight, by)
+            tables |= add_intervals(
+                {
+                    key: table.with_columns(
+                        total=pl.sum("count").over("q08")
+                    ).with_columns(percentage=pl.col("count") / pl.col("total"))
+                    for key, table in tables.items()
+                    if "count" in table.columns
+                },
+                method=intervals,
+                design_effects={
+                    key: effects[key[0]] for key in tables if key[0] in effects
+                },
+            )
+
+    # one group of outputs for the whole survey, or one by edition
+    group_paths = {
+        value: output_path if value is None else segment_path(output_path, by, value)
+        for value, _ in tables
+    }
+    caches = {
+        value: BuildCache(group_path, name="advanced_charts")
+        for value, group_path in group_paths.items()
+    }
+    stores = {
+        value: DatasetStore(group_path / "datasets_advanced_charts.ndjson")
+        if output_mode == "store"
+        else None
+        for value, group_path in group_paths.items()
+    }
+    render_jobs: dict[str | None, list[RenderJob]] = {value: [] for value in caches}
+    for (value, code), table in tables.items():
+        chart_fn = CHARTS[code][1]
+        with profiler.stage("plot_answers", code):
+            chart = chart_fn(plan, table)
+        if show:
+            display(table)
+            display(chart)
+        job = save_output(
+            table,
+            chart,
+            code,
+            caches[value],
+            group_paths[value],
+            formats,
+            scale_factor,
+            stores[value],
+        )
+        if job is not None:
+            render_jobs[value].append(job)
+
+    render_errors = render_charts(
+        [job for jobs in render_jobs.values() for job in jobs],
+        workers=workers,
+        formats=formats,
+        scale_factor=scale_factor,
     )
-)
-chart_q08_q18 = chart_q08_q18.encode(
-    color=alt.Color("frac:Q", title="Percentage", scale=alt.Scale(domain=[0, 1]))
-).mark_rect() + chart_q08_q18.mark_text(size=5, color="black")
+    for value, cache in caches.items():
+        cache.store_charts(render_jobs[value], render_errors, formats, scale_factor)
+        if stores[value] is not None:
+            stores[value].save(partial=only is not None)
+        # a partial run keeps the outputs of the charts it did not select
+        if only is None:
+            cache.evict()
+        else:
+            cache.save()
+    profiler.write(output_path / "profile.json", run="advanced_charts")
+    profiler.print_summary()
+
 
-display(chart_q08_q18)
+# %%
+if __name__ == "__main__":
+    plan, df = load_data()
+    original_columns = list(plan.header)
+    assert get_question_prompt(plan, "q01") == "Where do you live?"
+    assert get_choice_text(plan, "q07[SQ003]") == "I use NixOS"
+    df.head(3).collect()
 
-save_output(code="q08_q18", table=q08_q18, chart=chart_q08_q18)
+# %%
+if __name__ == "__main__":
+    run(show=True)
@@ -0,0 +1,187 @@
+import typing
+from collections.abc import Iterable
+
+import numpy as np
+import polars as pl
+
+from survey_plan import MULTIPLE_CHOICE_VALUES, NOT_ANSWERED, QuestionPlan
+
+if typing.TYPE_CHECKING:
+    import altair as alt
+
+# choices of multiple questions tested as yes/no variables, alongside the single
+# questions: "I use NixOS"
+ASSOCIATION_CHOICES = ("q07[SQ003]",)
+# respondents one-hot encoded at once, to bound the (respondents x levels) array
+ASSOCIATION_CHUNK = 2**16
+# Chebyshev fit of erfc(x) = t * exp(-x^2 + P(t)), t = 1 / (1 + x / 2), from
+# Numerical Recipes: coefficients of P, with a relative error below 1.2e-7
+ERFC_COEFFICIENTS = (
+    -1.26551223,
+    1.00002368,
+    0.37409196,
+    0.09678418,
+    -0.18628806,
+    0.27886807,
+    -1.13520398,
+    1.48851587,
+    -0.82215223,
+    0.17087277,
+)
+
+
+def _variables(
+    questions: Iterable[QuestionPlan],
+    choices: Iterable[str],
+) -> dict[str, tuple[str, ...]]:
+    # column id -> its answered levels, in the order of their enum codes
+    variables = {}
+    for question in questions:
+        if question.type == "single" and question.column_ids:
+            variables[question.id] = question.choices
+        elif question.type == "multiple":
+            for column_id in question.column_ids:
+                if column_id in choices:
+                    variables[column_id] = MULTIPLE_CHOICE_VALUES
+    return variables
+
+
+def _normal_sf(z: np.ndarray) -> np.ndarray:
+    # survival function of the standard normal distribution, erfc(z / sqrt(2)) / 2,
+    # as array operations, so that small p-values keep their relative precision
+    x = np.abs(z) / np.sqrt(2)
+    t = 1 / (1 + x / 2)
+    erfc = t * np.exp(-(x**2) + np.polynomial.polynomial.polyval(t, ERFC_COEFFICIENTS))
+    return np.where(z >= 0, erfc / 2, 1 - erfc / 2)
+
+
+def _chi2_sf(chi2: np.ndarray, dof: np.ndarray) -> np.ndarray:
+    # survival function of the chi-square distribution: exact for 1 and 2 degrees
+    # of freedom, and otherwise the Wilson-Hilferty normal approximation of
+    # (chi2 / dof)^(1/3)
+    dof = np.maximum(dof, 1)
+    mean, var = 1 - 2 / (9 * dof), 2 / (9 * dof)
+    approximation = _normal_sf((np.cbrt(chi2 / dof) - mean) / np.sqrt(var))
+    return np.select(
+        [dof == 1, dof == 2],
+        [2 * _normal_sf(np.sqrt(chi2)), np.exp(-chi2 / 2)],
+        approximation,
+    )
+
+
+def compute_associations(
+    questions: Iterable[QuestionPlan],
+    df: pl.LazyFrame,
+    choices: Iterable[str] = ASSOCIATION_CHOICES,
+) -> pl.DataFrame:
+    """Chi-square test and Cramér's V of every pair of single questions.
+
+    The selected `choices` of multiple questions are tested as yes/no variables.
+    The answers of all respondents are read in a single pass and one-hot encoded,
+    so that the contingency tables of all pairs are the blocks of one matrix
+    product. A pair is tested on the respondents who answered both, and the
+    statistics of all pairs are computed at once from their tables padded to the
+    same size. The result is sorted by decreasing Cramér's V.
+    """
+    variables = _variables(questions, set(choices))
+    columns = list(variables)
+    schema = {
+        "variable_a": pl.String,
+        "variable_b": pl.String,
+        "respondents": pl.Int64,
+        "chi2": pl.Float64,
+        "dof": pl.Int64,
+        "p_value": pl.Float64,
+        "cramers_v": pl.Float64,
+    }
+    if len(columns) < 2:
+        return pl.DataFrame(schema=schema)
+
+    codes = (
+        df.select(
+            pl.col(column).cast(pl.Enum(levels)).to_physical()
+            for column, levels in variables.items()
+        )
+        .collect()
+        .to_numpy()
+    )
+    # one-hot column of each (variable, level), NOT_ANSWERED excepted
+    sizes = np.array([len(levels) for levels in variables.values()])
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    answered = np.array(
+        [level != NOT_ANSWERED for levels in variables.values() for level in levels]
+    )
+    counts = np.zeros((offsets[-1], offsets[-1]), dtype=np.int64)
+    for start in range(0, codes.shape[0], ASSOCIATION_CHUNK):
+        chunk = codes[start : start + ASSOCIATION_CHUNK]
+        one_hot = np.zeros((chunk.shape[0], offsets[-1]), dtype=np.float32)
+        rows = np.arange(chunk.shape[0])
+        for column in range(chunk.shape[1]):
+            one_hot[rows, offsets[column] + chunk[:, column]] = 1
+        one_hot[:, ~answered] = 0
+        counts += (one_hot.T @ one_hot).round().astype(np.int64)
+
+    # contingency tables of all pairs, zero-padded to the largest one
+    pairs = [(a, b) for a in range(len(columns)) for b in range(a + 1, len(columns))]
+    size = sizes.max()
+    tables = np.zeros((len(pairs), size, size))
+    for i, (a, b) in enumerate(pairs):
+        tables[i, : sizes[a], : sizes[b]] = counts[
+            offsets[a] : offsets[a + 1], offsets[b] : offsets[b + 1]
+        ]
+    n = tables.sum(axis=(1, 2))
+    row_sums, column_sums = tables.sum(axis=2), tables.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = row_sums[:, :, None] * column_sums[:, None, :] / n[:, None, None]
+        chi2 = np.where(expected > 0, (tables - expected) ** 2 / expected, 0).sum(
+            axis=(1, 2)
+        )
+        # levels nobody answered do not count in the degrees of freedom
+        n_rows, n_columns = (row_sums > 0).sum(axis=1), (column_sums > 0).sum(axis=1)
+        dof = (n_rows - 1) * (n_columns - 1)
+        k = np.minimum(n_rows, n_columns) - 1
+        cramers_v = np.where((n > 0) & (k > 0), np.sqrt(chi2 / (n * k)), 0.0)
+    p_value = np.where(dof > 0, _chi2_sf(chi2, dof), 1.0)
+
+    return pl.DataFrame(
+        {
+            "variable_a": [columns[a] for a, _ in pairs],
+            "variable_b": [columns[b] for _, b in pairs],
+            "respondents": n.astype(np.int64),
+            "chi2": chi2,
+            "dof": dof,
+            "p_value": p_value,
+            "cramers_v": cramers_v,
+        },
+        schema=schema,
+    ).sort("cramers_v", "variable_a", "variable_b", descending=[True, False, False])
+
+
+def plot_associations(associations: pl.DataFrame) -> "alt.LayerChart":
+    import altair as alt
+
+    # both halves of the symmetric matrix, variables in survey order
+    variables = sorted({*associations["variable_a"], *associations["variable_b"]})
+    symmetric = pl.concat(
+        [
+            associations,
+            associations.rename(
+                {"variable_a": "variable_b", "variable_b": "variable_a"}
+            ).select(associations.columns),
+        ]
+    )
+    chart = alt.Chart(
+        symmetric,
+        title="Association between answers (Cramér's V)",
+    ).encode(
+        x=alt.X("variable_a:N", title=None).sort(variables),
+        y=alt.Y("variable_b:N", title=None).sort(variables),
+        tooltip=list(associations.columns),
+    )
+    return chart.encode(
+        color=alt.Color(
+            "cramers_v:Q", title="Cramér's V", scale=alt.Scale(domain=[0, 1])
+        )
+    ).mark_rect() + chart.encode(text=alt.Text("cramers_v:Q", format=".2f")).mark_text(
+        size=5, color="black"
+    )
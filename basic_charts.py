@@ -2,139 +2,141 @@
 import json
 import re
 import typing
-from copy import deepcopy
+from collections.abc import Callable, Collection
 from pathlib import Path
 from textwrap import wrap
-from typing import Literal
 
-import altair as alt
 import polars as pl
 
-with open("data/survey.json") as f:
-    survey = json.load(f)
-
-df = pl.read_csv("data/results-survey2024.csv").filter(
-    pl.col("submitdate. Date submitted") != ""
+from batch_stats import (
+    BATCHED_QUESTION_TYPES,
+    compute_batched_stats,
+    compute_segmented_stats,
+)
+from build_cache import BuildCache, question_answers_keys
+from confidence import add_intervals
+from cooccurrence import compute_cooccurrences, plot_cooccurrence
+from data_quality import load_clean_responses
+from editions import EDITION_COLUMN, load_editions, read_editions
+from incremental_stats import CountState
+from output_store import (
+    OUTPUT_MODES,
+    DatasetStore,
+    chart_job,
+    has_answers,
+    is_selected,
+    read_answers,
+    segment_path,
+    write_answers,
 )
+from profiling import profiler
+from ranking import compute_rankings, plot_borda, plot_pairwise
+from render import RENDER_FORMATS, RENDER_WORKERS, RenderJob, render_charts
+from survey_plan import NOT_ANSWERED, QuestionPlan, SurveyPlan, load_survey_plan
+from text_normalization import count_text_answers
+from weighting import WEIGHT_COLUMN, add_weights, design_effects, read_targets
 
-with open("data/results-survey2024-text_answers.json") as f:
-    text_answers = {
-        question_id: [
-            {"choice": choice, "count": count} for choice, count in answers.items()
-        ]
-        for question_id, answers in json.load(f).items()
-    }
+if typing.TYPE_CHECKING:
+    import altair as alt
 
 OUTPUT_PATH = Path("output/")
-
-
-# %%
-NOT_ANSWERED = "Not answered"
-OTHER = "Other"
-
-
-def get_actual_choices(
-    choices: list[str],
-    allow_other: bool,
-) -> list[str]:
-    choices = deepcopy(choices)
-    choices += [NOT_ANSWERED]
-    if allow_other:
-        choices += [OTHER]
-    return choices
-
-
-if typing.TYPE_CHECKING:
-    QuestionTypes = (
-        Literal["single"] | Literal["multiple"] | Literal["ranking"] | Literal["text"]
+# text answers analyzed by hand into themes, by question: the published charts of
+# the questions it covers
+TEXT_ANSWERS_PATH = Path("data/results-survey2024-text_answers.json")
+
+
+def load_data(
+    survey_path: Path | str = "data/survey.json",
+    csv_path: Path | str = "data/results-survey2024.csv",
+    text_answers_path: Path | str | None = TEXT_ANSWERS_PATH,
+    editions_path: Path | str | None = None,
+    weights_path: Path | str | None = None,
+) -> tuple[SurveyPlan, pl.LazyFrame, dict]:
+    # scanned lazily from the memory-mapped cache of the submitted responses that
+    # pass the data quality checks, shared with advanced_charts, so that each
+    # question only reads its own columns. With `editions_path`, the responses of
+    # all editions it lists, with their `edition`, instead of the ones of `csv_path`
+    if editions_path is None:
+        plan = load_survey_plan(survey_path, csv_path)
+        df = load_clean_responses(plan, csv_path)
+    else:
+        plan, df = load_editions(read_editions(editions_path))
+    # with `weights_path`, the raking weight of each respondent to the population
+    # shares it lists, by edition
+    if weights_path is not None:
+        by = None if editions_path is None else EDITION_COLUMN
+        df = add_weights(plan, df, read_targets(weights_path), by)
+
+    # text answers come from the file aggregated by hand for the questions it
+    # covers, and the others are normalized and counted from the export
+    text_answers = {}
+    if text_answers_path is not None:
+        with open(text_answers_path) as f:
+            text_answers = {
+                question_id: [
+                    {"choice": choice, "count": count}
+                    for choice, count in answers.items()
+                ]
+                for question_id, answers in json.load(f).items()
+            }
+    text_answers |= count_text_answers(
+        (q for q in plan.questions.values() if q.id not in text_answers), df
     )
 
+    return plan, df, text_answers
+
 
+# %%
 def compute_stats(
-    question: dict,
-    df: pl.DataFrame,
+    question: QuestionPlan,
+    df: pl.LazyFrame,
     text_answers: dict,
+    by: str | None = None,
+    weight: str | None = None,
 ) -> pl.DataFrame:
-    df = df.__copy__()
-    question = deepcopy(question)
-    question_id = question["id"]
-    question_type: "QuestionTypes" = question["type"]
-    question_allow_other = question.get("allow_other", False)
-    question_choices = get_actual_choices(
-        question.get("choices", []),
-        allow_other=question_allow_other,
-    )
+    question_id = question.id
+    question_type = question.type
+    choice_columns = list(question.column_ids)
+
+    if by is not None:
+        # the answers for each value of the `by` column, e.g. the `edition`
+        if question_type not in BATCHED_QUESTION_TYPES:
+            raise NotImplementedError(
+                f"Not implemented by {by} for question type {question_type}"
+            )
+        return pl.concat(
+            answers[question_id].select(pl.lit(value).alias(by), pl.all())
+            for value, answers in compute_segmented_stats(
+                [question], df, by, weight
+            ).items()
+        )
 
     answers: pl.DataFrame
     match question_type:
-        case "single":
-            choice_columns = [c for c in df.columns if c.startswith(f"{question_id}.")]
-            assert len(choice_columns) == 1
-            df = df.rename({choice_columns[0]: "choice"})
-            s = df["choice"]
-            s = s.set(s.str.len_chars() == 0, NOT_ANSWERED)
-            answers = s.value_counts()
-            answers = answers.with_columns(
-                (pl.col("count") / pl.sum("count")).alias("percentage")
-            )
-            # check values are within designed choices
-            for v in answers["choice"].to_list():
-                assert (
-                    v in question_choices
-                ), f"'{v}' not in choices: {', '.join(question_choices)}"
-        case "multiple":
-            choice_columns = [c for c in df.columns if c.startswith(f"{question_id}[")]
-            answers = (
-                df[choice_columns]
-                .unpivot()
-                .pivot(
-                    on="value",
-                    values="value",
-                    index="variable",
-                    aggregate_function="len",
-                )
-                .with_columns(pl.col("variable").str.extract(r".*\[(.+)\]"))
-                .rename({"variable": "choice"})
-                .unpivot(index=["choice"])
-                .rename({"value": "count"})
-                .with_columns(pl.col("count").fill_null(0))
-                .with_columns(
-                    pl.col("variable")
-                    .replace("Yes", "Selected")
-                    .replace("No", "Not selected")
-                )
-            )
-            answers = answers.join(
-                answers.group_by("choice").agg(pl.sum("count").alias("total")),
-                on=["choice"],
-            )
-            answers = answers.join(
-                answers.filter(pl.col("variable") == "Selected").select(
-                    "choice", pl.col("count").alias("by_choice_is_selected_count")
-                ),
-                on=["choice"],
-            )
-            answers = answers.with_columns(percentage=pl.col("count") / pl.col("total"))
+        case "single" | "multiple":
+            answers = compute_batched_stats([question], df, weight)[question_id]
         case "ranking":
-            choice_columns = [c for c in df.columns if c.startswith(f"{question_id}[")]
+            # respondents, or the sum of their weights, by choice and rank
+            weights = [] if weight is None else [weight]
             answers = (
-                df[choice_columns]
-                .unpivot()
+                df.select(pl.col(choice_columns).cast(pl.String), *weights)
+                .collect()
+                .unpivot(index=weights)
                 .pivot(
                     "variable",
-                    values="value",
+                    values="value" if weight is None else weight,
                     index="value",
-                    aggregate_function="len",
+                    aggregate_function="len" if weight is None else "sum",
                 )
                 .fill_null(0)
                 .rename({"value": "choice"})
-                .filter(pl.col("choice") != "")
+                .filter(pl.col("choice") != NOT_ANSWERED)
                 .rename(
                     {
-                        c: f"Rank {int(m.group(2)):02}"
+                        column_id: f"Rank {int(m.group(2)):02}"
                         if (m := re.match(r".*(Rank (\d+))", c)) is not None
                         else ""
-                        for c in choice_columns
+                        for column_id, c in zip(question.column_ids, question.columns)
                     }
                 )
                 .select("choice", *(f"Rank {i+1:02}" for i in range(5)))
@@ -151,9 +153,12 @@ def compute_stats(
                 .agg(count=pl.sum("count"))
             )
         case "text":
-            answers = pl.from_records(text_answers[question_id])
+            answers = pl.DataFrame(
+                text_answers[question_id],
+                schema={"choice": pl.String, "count": pl.Int64},
+            )
             count_median = answers.select(pl.median("count")).to_series()[0]
-            limit = max(count_median, 10)
+            limit = max(int(count_median or 0), 10)
             answers = answers.sort("count", descending=True).limit(limit)
         case _:
             raise NotImplementedError(
@@ -164,18 +169,15 @@ def compute_stats(
 
 
 def plot_answers(
-    question: dict,
+    question: QuestionPlan,
     answers: pl.DataFrame,
-) -> alt.Chart | alt.LayerChart | alt.FacetChart:
-    question = deepcopy(question)
-    question_type: "QuestionTypes" = question["type"]
-    question_prompt = strip_prompt(question["prompt"])
-    question_allow_other = question.get("allow_other", False)
-    question_keep_choice_order = question.get("keep_choice_order", False)
-    question_choices = get_actual_choices(
-        question.get("choices", []),
-        allow_other=question_allow_other,
-    )
+) -> "alt.Chart | alt.LayerChart | alt.FacetChart":
+    import altair as alt
+
+    question_type = question.type
+    question_prompt = strip_prompt(question.prompt)
+    question_keep_choice_order = question.keep_choice_order
+    question_choices = list(question.choices)
 
     def y_sort(y):
         if question_keep_choice_order:
@@ -248,6 +250,24 @@ def plot_answers(
                 f"Not implemented for question type {question_type}: {question_prompt}"
             )
 
+    error_bars = None
+    if "percentage_lower" in answers.columns:
+        # confidence interval of the percentage (of selection, for multiple
+        # questions), drawn in counts on the bars
+        error_bars = (
+            chart.transform_filter(alt.datum.variable == "Selected")
+            if question_type == "multiple"
+            else chart
+        )
+        error_bars = (
+            error_bars.transform_calculate(
+                count_lower="datum.percentage_lower * datum.total",
+                count_upper="datum.percentage_upper * datum.total",
+            )
+            .mark_rule(color="black")
+            .encode(x=alt.X("count_lower:Q"), x2=alt.X2("count_upper:Q"))
+        )
+
     bar_text_align, bar_text_dx, bat_text_color = (
         ("right", 0, "white") if bar_text_within else ("left", 5, "black")
     )
@@ -258,6 +278,8 @@ def plot_answers(
         size=10,
         color=bat_text_color,
     )
+    if error_bars is not None:
+        chart += error_bars
     if row:
         chart = chart.facet(row=row)
     chart = chart.properties(title=chart_title).configure_title(anchor="middle")
@@ -273,56 +295,382 @@ def strip_prompt(prompt: str):
 
 
 def process_question(
-    question: dict,
+    question: QuestionPlan,
+    df: pl.LazyFrame,
+    text_answers: dict,
+    output_path: Path,
+    answers: pl.DataFrame | None = None,
+    cache: BuildCache | None = None,
+    answers_key: str | None = None,
+    formats: tuple[str, ...] = RENDER_FORMATS,
+    scale_factor: float = 3,
+    store: DatasetStore | None = None,
+    weight: str | None = None,
+) -> RenderJob | None:
+    question_id = question.id
+
+    if (
+        cache is not None
+        and answers_key is not None
+        and cache.is_fresh("answers", question_id, answers_key)
+        and has_answers(question_id, output_path, store)
+    ):
+        with profiler.stage("read_answers", question_id):
+            answers = read_answers(question_id, output_path, store)
+    else:
+        if answers is None:
+            with profiler.stage("compute_stats", question_id):
+                answers = compute_stats(
+                    question=question,
+                    df=df,
+                    text_answers=text_answers,
+                    weight=weight,
+                )
+
+        with profiler.stage("write_answers", question_id):
+            answers_file = write_answers(answers, question_id, output_path, store)
+
+        if cache is not None and answers_key is not None:
+            cache.store("answers", question_id, answers_key, [answers_file])
+
+    with profiler.stage("plot_answers", question_id):
+        chart = plot_answers(
+            question=question,
+            answers=answers,
+        )
+
+    # rendering is deferred to the process pool of `render_charts`
+    with profiler.stage("chart_spec", question_id):
+        job = chart_job(question_id, chart, output_path, store)
+    if cache is not None and cache.is_fresh(
+        "chart", question_id, cache.chart_key(job, formats, scale_factor)
+    ):
+        return None
+    return job
+
+
+def process_table(
+    question: QuestionPlan,
+    table: pl.DataFrame,
+    code: str,
+    plot: Callable[[QuestionPlan, pl.DataFrame], "alt.TopLevelMixin"],
     output_path: Path,
+    cache: BuildCache | None = None,
+    formats: tuple[str, ...] = RENDER_FORMATS,
+    scale_factor: float = 3,
+    store: DatasetStore | None = None,
+) -> RenderJob | None:
+    # answers and chart of a table derived from a question (co-occurrences,
+    # ranking scores), which is cheap to compute, so always recomputed
+    answers_key = BuildCache.key(table.to_dicts())
+    if (
+        cache is None
+        or not cache.is_fresh("answers", code, answers_key)
+        or not has_answers(code, output_path, store)
+    ):
+        answers_file = write_answers(table, code, output_path, store)
+        if cache is not None:
+            cache.store("answers", code, answers_key, [answers_file])
+
+    with profiler.stage("plot_answers", code):
+        chart = plot(question, table)
+    with profiler.stage("chart_spec", code):
+        job = chart_job(code, chart, output_path, store)
+    if cache is not None and cache.is_fresh(
+        "chart", code, cache.chart_key(job, formats, scale_factor)
+    ):
+        return None
+    return job
+
+
+def run(
+    only: Collection[str] | None = None,
+    formats: tuple[str, ...] = RENDER_FORMATS,
+    scale_factor: float = 3,
+    workers: int = RENDER_WORKERS,
+    output_path: Path = OUTPUT_PATH,
+    output_mode: str = "files",
+    intervals: str | None = None,
+    segment: str | None = None,
+    incremental: bool = False,
+    editions_path: Path | str | None = None,
+    weights_path: Path | str | None = None,
+    text_answers_path: Path | str | None = TEXT_ANSWERS_PATH,
 ):
-    question = deepcopy(question)
-    question_id = question["id"]
+    """Write the answers and charts of every question, or of the `only` ones.
+
+    Questions whose columns and survey.json entry did not change since the last
+    run are read back from their answers file, and unchanged charts are not
+    rendered again. In the "store" output mode, all answers go to a single
+    `datasets_basic_charts.ndjson` which the JSON chart specs refer to. With
+    `intervals` ("wilson" or "bootstrap"), the percentages of single and multiple
+    questions get a confidence interval, drawn as error bars.
+
+    With a `segment` single question, the whole report is written for each of
+    its answers under `output/<segment>/<value>/`: the segment is one more key of
+    the single aggregation pass, and the charts of all segments are rendered in
+    the same process pool. Text answers, which are analyzed by hand (or counted)
+    for the whole survey, co-occurrences and ranking scores are not segmented.
+
+    With `incremental`, the counts of single and multiple questions are kept in
+    `output/.counts_basic_charts.parquet`, and each run only counts the responses
+    submitted since the previous one. Their answers are then keyed by their
+    numbers rather than by their columns, so that only the charts whose numbers
+    changed are written and rendered again.
+
+    With `editions_path`, the responses of several editions of the survey are
+    loaded together (see `editions.load_editions`), and `segment` may be
+    "edition" to write the report of each of them.
+
+    With `weights_path`, the respondents are weighted to the population shares
+    it lists (see `weighting.add_weights`), and the answers of single, multiple
+    and ranking questions are sums of weights rather than counts. Text answers
+    and co-occurrences stay counts of respondents.
+
+    Text answers are read from `text_answers_path`, analyzed by hand, for the
+    questions it covers, and normalized and counted from the export for the
+    others (all of them without a file, see `text_normalization`).
+    """
+    assert output_mode in OUTPUT_MODES, f"Unknown output mode {output_mode}"
+    assert not (incremental and editions_path), "Incremental runs have one edition"
+    assert not (incremental and weights_path), "Incremental runs are not weighted"
+    with profiler.stage("load"):
+        plan, df, text_answers = load_data(
+            text_answers_path=text_answers_path,
+            editions_path=editions_path,
+            weights_path=weights_path,
+        )
+    weight = None if weights_path is None else WEIGHT_COLUMN
+    questions = [q for q in plan.questions.values() if is_selected(q.id, only)]
+
+    # one group of outputs for the whole survey, or one by segment value
+    groups: dict[str | None, tuple[Path, pl.LazyFrame]]
+    if segment is None:
+        groups = {None: (output_path, df)}
+    else:
+        assert segment == EDITION_COLUMN or plan.questions[segment].type == "single", (
+            f"{segment} is not a single question"
+        )
+        questions = [q for q in questions if q.type != "text" and q.id != segment]
+        values = df.select(pl.col(segment).unique().sort()).collect()[segment]
+        groups = {
+            value: (
+                segment_path(output_path, segment, value),
+                df.filter(pl.col(segment) == value),
+            )
+            for value in values
+        }
+    caches = {
+        value: BuildCache(group_path, name="basic_charts")
+        for value, (group_path, _) in groups.items()
+    }
+    stores = {
+        value: DatasetStore(group_path / "datasets_basic_charts.ndjson")
+        if output_mode == "store"
+        else None
+        for value, (group_path, _) in groups.items()
+    }
 
+    counted_answers: dict[str, pl.DataFrame] = {}
+    if incremental:
+        assert segment is None, "Incremental runs are not segmented"
+        # the state covers all questions, whichever are selected
+        with profiler.stage("incremental_stats"):
+            counted_answers = CountState(output_path, name="basic_charts").update(
+                plan.questions.values(), df
+            )
+        counted_answers = {
+            question.id: counted_answers[question.id]
+            for question in questions
+            if question.id in counted_answers
+        }
+    with profiler.stage("answers_keys"):
+        answers_keys = question_answers_keys(
+            (q for q in questions if q.id not in counted_answers),
+            df,
+            text_answers,
+            segment,
+            weight,
+        )
+        answers_keys |= {
+            question_id: BuildCache.key(
+                dict(plan.questions[question_id].question), answers.to_dicts()
+            )
+            for question_id, answers in counted_answers.items()
+        }
+    if intervals is not None:
+        answers_keys = {
+            question_id: BuildCache.key(key, intervals)
+            for question_id, key in answers_keys.items()
+        }
+    stale_questions = [
+        question
+        for question in questions
+        if any(
+            not caches[value].is_fresh(
+                "answers", question.id, answers_keys[question.id]
+            )
+            or not has_answers(question.id, group_path, stores[value])
+            for value, (group_path, _) in groups.items()
+        )
+    ]
+    # all single and multiple questions, of all segments, are aggregated together
+    # in one pass
+    with profiler.stage("batched_stats"):
+        if incremental:
+            group_answers = {
+                None: {
+                    question.id: counted_answers[question.id]
+                    for question in stale_questions
+                    if question.id in counted_answers
+                }
+            }
+        elif segment is None:
+            group_answers = {None: compute_batched_stats(stale_questions, df, weight)}
+        else:
+            group_answers = compute_segmented_stats(
+                stale_questions, df, segment, weight
+            )
+    if intervals is not None:
+        # the counts of single questions are shares of all their respondents, and
+        # weighted counts are worth fewer respondents, by segment
+        with profiler.stage("intervals"):
+            effects = {} if weight is None else design_effects(df, weight, segment)
+            answers = add_intervals(
+                {
+                    (value, question_id): answers
+                    if "total" in answers.columns
+                    else answers.with_columns(total=pl.sum("count"))
+                    for value, batched_answers in group_answers.items()
+                    for question_id, answers in batched_answers.items()
+                },
+                method=intervals,
+                design_effects={
+                    (value, question_id): effects[value]
+                    for value, batched_answers in group_answers.items()
+                    for question_id in batched_answers
+                    if value in effects
+                },
+            )
+            group_answers = {
+                value: {
+                    question_id: answers[value, question_id]
+                    for question_id in batched_answers
+                }
+                for value, batched_answers in group_answers.items()
+            }
+
+    render_jobs: dict[str | None, list[RenderJob]] = {value: [] for value in groups}
+    for value, (group_path, group_df) in groups.items():
+        for question in questions:
+            try:
+                job = process_question(
+                    question=question,
+                    df=group_df,
+                    text_answers=text_answers,
+                    output_path=group_path,
+                    answers=group_answers.get(value, {}).get(question.id),
+                    cache=caches[value],
+                    answers_key=answers_keys[question.id],
+                    formats=formats,
+                    scale_factor=scale_factor,
+                    store=stores[value],
+                    weight=weight,
+                )
+            except NotImplementedError as e:
+                print(f"{question.id} error={e}")
+                continue
+            if job is not None:
+                render_jobs[value].append(job)
+    if segment is None:
+        # which choices of multiple questions are selected together
+        with profiler.stage("cooccurrence"):
+            cooccurrences = compute_cooccurrences(
+                (
+                    q
+                    for q in plan.questions.values()
+                    if is_selected(f"cooc_{q.id}", only)
+                ),
+                df,
+            )
+        derived_tables = [
+            (question_id, f"cooc_{question_id}", cooccurrence, plot_cooccurrence)
+            for question_id, cooccurrence in cooccurrences.items()
+        ]
+        # Borda scores and pairwise preferences of ranking questions, from a single
+        # rank matrix per question
+        with profiler.stage("ranking"):
+            rankings = compute_rankings(
+                (
+                    q
+                    for q in plan.questions.values()
+                    if is_selected(f"borda_{q.id}", only)
+                    or is_selected(f"pairwise_{q.id}", only)
+                ),
+                df,
+                weight,
+            )
+        for question_id, ranking in rankings.items():
+            derived_tables += [
+                (question_id, f"borda_{question_id}", ranking.scores, plot_borda),
+                (
+                    question_id,
+                    f"pairwise_{question_id}",
+                    ranking.pairwise,
+                    plot_pairwise,
+                ),
+            ]
+        for question_id, code, table, plot in derived_tables:
+            job = process_table(
+                question=plan.questions[question_id],
+                table=table,
+                code=code,
+                plot=plot,
+                output_path=output_path,
+                cache=caches[None],
+                formats=formats,
+                scale_factor=scale_factor,
+                store=stores[None],
+            )
+            if job is not None:
+                render_jobs[None].append(job)
+
+    render_errors = render_charts(
+        [job for jobs in render_jobs.values() for job in jobs],
+        workers=workers,
+        formats=formats,
+        scale_factor=scale_factor,
+    )
+    for value, cache in caches.items():
+        cache.store_charts(render_jobs[value], render_errors, formats, scale_factor)
+        if stores[value] is not None:
+            stores[value].save(partial=only is not None)
+        # a partial run keeps the outputs of the questions it did not select
+        if only is None:
+            cache.evict()
+        else:
+            cache.save()
+    # time and memory of every stage, by question
+    profiler.write(output_path / "profile.json", run="basic_charts")
+    profiler.print_summary()
+
+
+# %%
+# helpful to debug
+if __name__ == "__main__":
+    plan, df, text_answers = load_data()
+    question = plan.questions["q27"]
     answers = compute_stats(
         question=question,
         df=df,
         text_answers=text_answers,
     )
-    chart = plot_answers(
+    plot_answers(
         question=question,
         answers=answers,
     )
 
-    output_path.mkdir(parents=True, exist_ok=True)
-
-    answers_path = output_path / f"answers_{question_id}.json"
-    with open(answers_path, "w") as f:
-        json.dump(obj=answers.to_dicts(), fp=f)
-
-    chart_plot_path = output_path / f"chart_plot_{question_id}.png"
-    with open(chart_plot_path, "wb") as f:
-        chart.save(fp=f, format="png", scale_factor=3)
-
-    chart_json_path = output_path / f"chart_json_{question_id}.json"
-    with open(chart_json_path, "w") as f:
-        chart.save(fp=f, format="json")
-
-
-# helpful to debug
-question = deepcopy(survey["questions"][26])
-answers = compute_stats(
-    question=question,
-    df=df,
-    text_answers=text_answers,
-)
-plot_answers(
-    question=question,
-    answers=answers,
-)
-
 # %%
 # RUN ALL
-for question in survey["questions"]:
-    try:
-        process_question(
-            question=question,
-            output_path=OUTPUT_PATH,
-        )
-    except NotImplementedError as e:
-        print(f"{question["id"]} error={e}")
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,200 @@
+from collections.abc import Iterable
+
+import polars as pl
+
+from survey_plan import NOT_ANSWERED, QuestionPlan
+from weighting import weighted_len
+
+BATCHED_QUESTION_TYPES = ("single", "multiple")
+
+
+def _column_index(questions: list[QuestionPlan]) -> pl.DataFrame:
+    # one row per answer column: which question it belongs to, and which choice
+    # it holds for multiple questions (the bracketed suffix of the CSV header)
+    return pl.DataFrame(
+        {
+            "question": [q.id for q in questions for _ in q.column_ids],
+            "type": [q.type for q in questions for _ in q.column_ids],
+            "variable": [c for q in questions for c in q.column_ids],
+            "header": [c for q in questions for c in q.columns],
+            "column_order": [i for q in questions for i in range(len(q.column_ids))],
+        }
+    ).select(
+        "question",
+        "variable",
+        "column_order",
+        choice=pl.when(pl.col("type") == "multiple").then(
+            pl.col("header").str.extract(r".*\[(.+)\]")
+        ),
+    )
+
+
+def _enum_values(schema: pl.Schema, columns: list[str]) -> pl.DataFrame:
+    # (column, code) -> value, for enum columns
+    return pl.concat(
+        pl.DataFrame(
+            {
+                "variable": column,
+                "value": schema[column].categories,
+            }
+        ).with_row_index("code")
+        for column in columns
+    )
+
+
+def _single_answers(question: QuestionPlan, counts: pl.DataFrame) -> pl.DataFrame:
+    answers = (
+        counts.select(
+            choice=pl.when(pl.col("value").str.len_chars() == 0)
+            .then(pl.lit(NOT_ANSWERED))
+            .otherwise(pl.col("value")),
+            count=pl.col("count"),
+        )
+        .group_by("choice", maintain_order=True)
+        .agg(pl.sum("count"))
+        .with_columns((pl.col("count") / pl.sum("count")).alias("percentage"))
+    )
+    # check values are within designed choices
+    unexpected = answers.filter(~pl.col("choice").is_in(question.choices))["choice"]
+    assert unexpected.is_empty(), (
+        f"{unexpected.to_list()} not in choices: {', '.join(question.choices)}"
+    )
+    return answers
+
+
+def _multiple_answers(counts: pl.DataFrame) -> pl.DataFrame:
+    # pivoting the (already aggregated) counts gives every (choice, value) pair of
+    # the question, with nulls for the pairs nobody answered
+    answers = (
+        counts.pivot(on="value", index=["choice", "column_order"], values="count")
+        .sort("column_order")
+        .drop("column_order")
+        .unpivot(index=["choice"], value_name="count")
+        .with_columns(pl.col("count").fill_null(0))
+        .with_columns(
+            pl.col("variable").replace("Yes", "Selected").replace("No", "Not selected")
+        )
+    )
+    answers = answers.with_columns(total=pl.sum("count").over("choice"))
+    answers = answers.join(
+        answers.filter(pl.col("variable") == "Selected").select(
+            "choice", pl.col("count").alias("by_choice_is_selected_count")
+        ),
+        on=["choice"],
+    )
+    return answers.with_columns(percentage=pl.col("count") / pl.col("total"))
+
+
+def count_answers(
+    questions: list[QuestionPlan],
+    df: pl.LazyFrame,
+    segment: str | None = None,
+    weight: str | None = None,
+) -> pl.DataFrame:
+    # grouping by answer column is grouping by (question, choice): the column
+    # index is joined on the aggregated counts rather than on the unpivoted rows.
+    # A segment column is one more group_by key, as a `segment` column, and a
+    # weight column is summed instead of counting rows
+    column_index = _column_index(questions)
+    columns = column_index["variable"].to_list()
+    keys = [] if segment is None else ["segment"]
+    index = [*keys, *([] if weight is None else [weight])]
+    segment_column = [] if segment is None else [pl.col(segment).alias("segment")]
+    weight_column = [] if weight is None else [weight]
+    schema = df.collect_schema()
+    if all(isinstance(schema[column], pl.Enum) for column in columns):
+        # enum-encoded answers are grouped by their integer codes, and only the
+        # aggregated counts are decoded
+        counts = (
+            df.select(
+                pl.col(columns).to_physical().cast(pl.UInt32),
+                *segment_column,
+                *weight_column,
+            )
+            .unpivot(index=index, value_name="code")
+            .group_by(*keys, "variable", "code")
+            .agg(weighted_len(weight).alias("count"))
+            .join(
+                _enum_values(schema, columns).lazy(),
+                on=["variable", "code"],
+                how="left",
+            )
+            .drop("code")
+        )
+    else:
+        counts = (
+            df.select(pl.col(columns).cast(pl.String), *segment_column, *weight_column)
+            .unpivot(index=index)
+            .group_by(*keys, "variable", "value")
+            .agg(weighted_len(weight).alias("count"))
+        )
+    return counts.join(column_index.lazy(), on="variable").collect()
+
+
+def merge_counts(*counts: pl.DataFrame) -> pl.DataFrame:
+    # counts of disjoint sets of respondents, summed by answer, in a stable order
+    # so that unchanged answers hash the same
+    keys = ["question", "variable", "column_order", "choice", "value"]
+    return (
+        pl.concat(c.select(*keys, "count") for c in counts)
+        .group_by(keys)
+        .agg(pl.sum("count"))
+        .sort(keys)
+    )
+
+
+def answers_from_counts(
+    questions: list[QuestionPlan],
+    counts: pl.DataFrame,
+) -> dict[str, pl.DataFrame]:
+    counts_by_question = counts.partition_by("question", as_dict=True)
+    answers = {}
+    for question in questions:
+        question_counts = counts_by_question.get((question.id,), counts.clear())
+        match question.type:
+            case "single":
+                answers[question.id] = _single_answers(question, question_counts)
+            case "multiple":
+                answers[question.id] = _multiple_answers(question_counts)
+    return answers
+
+
+def compute_batched_stats(
+    questions: Iterable[QuestionPlan],
+    df: pl.LazyFrame,
+    weight: str | None = None,
+) -> dict[str, pl.DataFrame]:
+    """Compute the answers of all single and multiple questions in one pass.
+
+    All answer columns are unpivoted together and counted with a single group_by
+    over (question, choice, value), instead of one reshape chain per question.
+    Each returned table has the same shape as the one of `compute_stats`. With a
+    `weight` column, the counts are the sums of the weights of the respondents.
+    """
+    questions = [q for q in questions if q.type in BATCHED_QUESTION_TYPES]
+    if not questions:
+        return {}
+    return answers_from_counts(questions, count_answers(questions, df, weight=weight))
+
+
+def compute_segmented_stats(
+    questions: Iterable[QuestionPlan],
+    df: pl.LazyFrame,
+    segment: str,
+    weight: str | None = None,
+) -> dict[str, dict[str, pl.DataFrame]]:
+    """Same as `compute_batched_stats`, for each value of the `segment` column.
+
+    The segment is one more group_by key of the same single pass, and the
+    answers are returned by segment value, then by question id.
+    """
+    questions = [q for q in questions if q.type in BATCHED_QUESTION_TYPES]
+    if not questions:
+        return {}
+    counts = count_answers(questions, df, segment, weight)
+    return {
+        value: answers_from_counts(questions, segment_counts.drop("segment"))
+        for (value,), segment_counts in counts.partition_by(
+            "segment", as_dict=True, maintain_order=True
+        ).items()
+    }
@@ -0,0 +1,193 @@
+import argparse
+import json
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from profiling import peak_rss_mb
+from synthetic_survey import write_responses
+
+SIZES = (1_000, 100_000, 1_000_000)
+STAGES = (
+    "load",
+    "batched_stats",
+    "crosstab",
+    "cooccurrence",
+    "ranking",
+    "text_answers",
+    "associations",
+    "data_quality",
+    "weighting",
+    "ranking_stats",
+    "plot_answers",
+    "render_spec",
+    "render_draft",
+)
+CROSSTABS = (("q08", "q09"), ("q08", "q14"), ("q08", "q18"), ("q06", "q13"))
+
+
+def run_stage(stage: str, survey_path: Path, csv_path: Path) -> dict:
+    # runs in a fresh process, so that peak memory is the one of this stage only
+    import polars as pl
+
+    from associations import compute_associations
+    from basic_charts import compute_stats, plot_answers
+    from batch_stats import compute_batched_stats
+    from cooccurrence import compute_cooccurrences
+    from crosstab import crosstab
+    from data_quality import quality_flags
+    from output_store import chart_job
+    from ranking import compute_rankings
+    from render import RENDER_PRESETS, render_charts
+    from survey_data import build_responses_cache, load_responses, responses_cache_path
+    from survey_plan import NOT_ANSWERED, load_survey_plan
+    from text_normalization import count_text_answers
+    from weighting import WEIGHT_COLUMN, WEIGHTING_QUESTIONS, add_weights
+
+    plan = load_survey_plan(survey_path, csv_path)
+    if stage != "load":
+        df = load_responses(plan, csv_path)
+    if stage == "weighting":
+        # equal shares of the answered choices of the export
+        targets = {
+            question_id: {
+                choice: 1.0
+                for choice in df.select(pl.col(question_id).unique().cast(pl.String))
+                .collect()
+                .to_series()
+                if choice != NOT_ANSWERED
+            }
+            for question_id in WEIGHTING_QUESTIONS
+        }
+    if stage in ("plot_answers", "render_spec", "render_draft"):
+        # the answers of all questions, then their charts, are computed beforehand
+        text_answers = count_text_answers(plan.questions.values(), df)
+        answers = {
+            question.id: compute_stats(question, df, text_answers)
+            for question in plan.questions.values()
+            if question.column_ids
+        }
+        if stage != "plot_answers":
+            jobs = [
+                chart_job(
+                    question_id,
+                    plot_answers(plan.questions[question_id], question_answers),
+                    csv_path.parent / stage,
+                )
+                for question_id, question_answers in answers.items()
+            ]
+    rss_before = peak_rss_mb()
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    match stage:
+        case "load":
+            build_responses_cache(plan, csv_path, responses_cache_path(csv_path))
+        case "batched_stats":
+            compute_batched_stats(plan.questions.values(), df)
+        case "crosstab":
+            for question_a, question_b in CROSSTABS:
+                crosstab(plan, df, question_a, question_b)
+        case "cooccurrence":
+            compute_cooccurrences(plan.questions.values(), df)
+        case "ranking":
+            compute_rankings(plan.questions.values(), df)
+        case "text_answers":
+            count_text_answers(plan.questions.values(), df)
+        case "associations":
+            compute_associations(plan.questions.values(), df)
+        case "data_quality":
+            quality_flags(plan, df).collect()
+        case "weighting":
+            weighted = add_weights(plan, df, targets)
+            for question_a, question_b in CROSSTABS:
+                crosstab(plan, weighted, question_a, question_b, weight=WEIGHT_COLUMN)
+        case "ranking_stats":
+            # the ranking branch of compute_stats, which the batched pass skips
+            for question in plan.questions.values():
+                if question.type == "ranking" and question.column_ids:
+                    compute_stats(question, df, {})
+        case "plot_answers":
+            for question_id, question_answers in answers.items():
+                chart_job(
+                    question_id,
+                    plot_answers(plan.questions[question_id], question_answers),
+                    csv_path.parent / stage,
+                )
+        case "render_spec" | "render_draft":
+            preset = RENDER_PRESETS["spec-only" if stage == "render_spec" else "draft"]
+            render_charts(
+                jobs, formats=preset.formats, scale_factor=preset.scale_factor
+            )
+        case _:
+            raise NotImplementedError(f"Not implemented for stage {stage}")
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    return {
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_before_mb": rss_before,
+    }
+
+
+def run_benchmarks(
+    sizes: tuple[int, ...] = SIZES,
+    stages: tuple[str, ...] = STAGES,
+    survey_path: Path = Path("data/survey.json"),
+) -> list[dict]:
+    with open(survey_path) as f:
+        survey = json.load(f)
+
+    results = []
+    # spawned, so that every stage starts from a clean process
+    mp_context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            csv_path = Path(tmp) / f"results-{n}.csv"
+            write_responses(survey, n, csv_path)
+            for stage in stages:
+                with ProcessPoolExecutor(1, mp_context=mp_context) as executor:
+                    result = executor.submit(
+                        run_stage, stage, survey_path, csv_path
+                    ).result()
+                result = {
+                    "stage": stage,
+                    "respondents": n,
+                    **result,
+                    "rows_per_s": n / result["wall_s"],
+                }
+                results.append(result)
+                print(
+                    f"{stage:>14} {n:>9} rows"
+                    f" {result['wall_s']:8.3f}s wall {result['cpu_s']:8.3f}s cpu"
+                    f" {result['rows_per_s']:12.0f} rows/s"
+                    f" {result['peak_rss_mb']:8.1f} MB peak"
+                )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the pipeline stages on synthetic exports of growing size."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: tuple(int(n) for n in s.split(",")),
+        default=SIZES,
+        help="comma separated numbers of respondents",
+    )
+    parser.add_argument(
+        "--stages",
+        type=lambda s: tuple(s.split(",")),
+        default=STAGES,
+        help=f"comma separated stages among {', '.join(STAGES)}",
+    )
+    parser.add_argument("--output", type=Path, default=Path("output/benchmark.json"))
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.stages)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(obj=results, fp=f, indent=2)
@@ -0,0 +1,139 @@
+import hashlib
+import json
+from collections.abc import Iterable
+from pathlib import Path
+
+import polars as pl
+
+from render import RENDER_FORMATS, RenderJob, render_outputs
+from survey_plan import QuestionPlan
+
+
+class BuildCache:
+    """On-disk record of which outputs are up to date, by stage and by code.
+
+    Each entry stores the content hash the outputs were built from. A stage whose
+    key did not change (and whose files are still there) can be skipped; entries
+    that are not used by a run are evicted, with their files, by `evict`, and
+    the files an entry no longer lists when it is stored again are deleted.
+    """
+
+    def __init__(self, output_path: Path, name: str):
+        self.output_path = output_path
+        self.manifest_path = output_path / f".build_cache_{name}.json"
+        self.entries: dict[str, dict[str, dict]] = {}
+        if self.manifest_path.exists():
+            with open(self.manifest_path) as f:
+                self.entries = json.load(f)
+        self.used: set[tuple[str, str]] = set()
+
+    @staticmethod
+    def key(*parts) -> str:
+        content = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    @staticmethod
+    def chart_key(
+        job: RenderJob,
+        formats: tuple[str, ...] = RENDER_FORMATS,
+        scale_factor: float = 3,
+    ) -> str:
+        # the PNG scale only matters to charts rendered to PNG
+        return BuildCache.key(
+            job.spec, job.json_spec, formats, scale_factor if "png" in formats else None
+        )
+
+    def is_fresh(self, stage: str, code: str, key: str) -> bool:
+        entry = self.entries.get(stage, {}).get(code)
+        if entry is None or entry["key"] != key:
+            return False
+        if not all((self.output_path / file).exists() for file in entry["files"]):
+            return False
+        self.used.add((stage, code))
+        return True
+
+    def store(self, stage: str, code: str, key: str, files: Iterable[Path]):
+        files = [str(Path(file).relative_to(self.output_path)) for file in files]
+        previous = self.entries.get(stage, {}).get(code)
+        self.entries.setdefault(stage, {})[code] = {"key": key, "files": files}
+        self.used.add((stage, code))
+        if previous is not None:
+            # files of the previous build that this one did not write, such as the
+            # PNG of a chart now rendered with the draft preset
+            self._remove(set(previous["files"]) - set(files))
+
+    def _remove(self, files: set[str]):
+        # deletes the files no entry refers to anymore
+        referenced = {
+            file
+            for entries in self.entries.values()
+            for entry in entries.values()
+            for file in entry["files"]
+        }
+        for file in files - referenced:
+            (self.output_path / file).unlink(missing_ok=True)
+
+    def store_charts(
+        self,
+        jobs: Iterable[RenderJob],
+        errors: dict[RenderJob, Exception],
+        formats: tuple[str, ...] = RENDER_FORMATS,
+        scale_factor: float = 3,
+    ):
+        for job in jobs:
+            if job not in errors:
+                files = render_outputs(job, formats).values()
+                key = self.chart_key(job, formats, scale_factor)
+                self.store("chart", job.code, key, files)
+
+    def evict(self):
+        kept_files = {
+            file
+            for stage, code in self.used
+            for file in self.entries[stage][code]["files"]
+        }
+        for stage, entries in self.entries.items():
+            for code in [code for code in entries if (stage, code) not in self.used]:
+                for file in entries.pop(code)["files"]:
+                    if file not in kept_files:
+                        (self.output_path / file).unlink(missing_ok=True)
+        self.save()
+
+    def save(self):
+        self.output_path.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_path, "w") as f:
+            json.dump(obj=self.entries, fp=f)
+
+
+def question_answers_keys(
+    questions: Iterable[QuestionPlan],
+    df: pl.LazyFrame,
+    text_answers: dict,
+    segment: str | None = None,
+    weight: str | None = None,
+) -> dict[str, str]:
+    # the answers of a question only depend on its survey.json entry and on its
+    # columns (and on the segment and weight columns, for segmented and weighted
+    # answers): all columns are hashed in a single pass over the frame
+    questions = list(questions)
+    extra_columns = [c for c in (segment, weight) if c is not None]
+    data_hashes = (
+        df.select(
+            pl.struct(*extra_columns, *question.column_ids)
+            .hash(seed=0)
+            .sum()
+            .alias(question.id)
+            for question in questions
+            if question.column_ids
+        )
+        .collect()
+        .to_dicts()[0]
+    )
+    return {
+        question.id: BuildCache.key(
+            dict(question.question),
+            data_hashes.get(question.id),
+            text_answers.get(question.id),
+        )
+        for question in questions
+    }
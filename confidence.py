@@ -0,0 +1,98 @@
+from collections.abc import Mapping
+from statistics import NormalDist
+
+import numpy as np
+import polars as pl
+
+INTERVAL_METHODS = ("wilson", "bootstrap")
+CONFIDENCE_LEVEL = 0.95
+BOOTSTRAP_RESAMPLES = 2000
+# cells resampled at once, to bound the (resamples x cells) array to ~64 MB
+BOOTSTRAP_CHUNK = 2**23 // BOOTSTRAP_RESAMPLES
+
+
+def wilson_intervals(
+    count: np.ndarray,
+    total: np.ndarray,
+    level: float = CONFIDENCE_LEVEL,
+) -> tuple[np.ndarray, np.ndarray]:
+    z = NormalDist().inv_cdf(0.5 + level / 2)
+    n = np.maximum(total, 1)
+    p = count / n
+    center = (p + z**2 / (2 * n)) / (1 + z**2 / n)
+    margin = z / (1 + z**2 / n) * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2))
+    return np.clip(center - margin, 0, 1), np.clip(center + margin, 0, 1)
+
+
+def bootstrap_intervals(
+    count: np.ndarray,
+    total: np.ndarray,
+    level: float = CONFIDENCE_LEVEL,
+    resamples: int = BOOTSTRAP_RESAMPLES,
+    seed: int = 0,
+) -> tuple[np.ndarray, np.ndarray]:
+    # percentile bootstrap: each cell is a count out of a fixed total, so its
+    # share in a multinomial resample of the respondents is binomial, and all
+    # cells of all tables are resampled together as one array
+    rng = np.random.default_rng(seed)
+    # weighted counts are resampled as their nearest number of respondents
+    n = np.maximum(np.rint(total), 1).astype(np.int64)
+    p = np.divide(count, total, out=np.zeros(len(count)), where=total > 0)
+    quantiles = [(1 - level) / 2, (1 + level) / 2]
+    lower, upper = np.empty(len(count)), np.empty(len(count))
+    for start in range(0, len(count), BOOTSTRAP_CHUNK):
+        cells = slice(start, start + BOOTSTRAP_CHUNK)
+        shares = rng.binomial(n[cells], p[cells], size=(resamples, len(p[cells])))
+        lower[cells], upper[cells] = np.quantile(shares / n[cells], quantiles, axis=0)
+    return lower, upper
+
+
+def add_intervals(
+    tables: Mapping[str, pl.DataFrame],
+    method: str = "wilson",
+    level: float = CONFIDENCE_LEVEL,
+    resamples: int = BOOTSTRAP_RESAMPLES,
+    seed: int = 0,
+    design_effects: Mapping[str, float] | None = None,
+) -> dict[str, pl.DataFrame]:
+    """Add `percentage_lower` and `percentage_upper` to tables of counts.
+
+    Each table needs a `count` and a `total` column: the interval is the one of
+    the share `count / total`. The cells of all tables are computed at once,
+    either with the Wilson score interval or with a bootstrap of `resamples`.
+    Counts of weighted respondents are divided by the `design_effects` of their
+    table (see `weighting.design_effects`), so that the interval is the one of
+    Kish's effective number of respondents.
+    """
+    assert method in INTERVAL_METHODS, f"Unknown interval method {method}"
+    tables = dict(tables)
+    if not tables:
+        return {}
+
+    cells = pl.concat(
+        table.select(pl.col("count", "total").cast(pl.Float64))
+        for table in tables.values()
+    )
+    count, total = cells["count"].to_numpy(), cells["total"].to_numpy()
+    if design_effects is not None:
+        effects = np.repeat(
+            [design_effects.get(code, 1.0) for code in tables],
+            [table.height for table in tables.values()],
+        )
+        count, total = count / effects, total / effects
+    match method:
+        case "wilson":
+            lower, upper = wilson_intervals(count, total, level)
+        case "bootstrap":
+            lower, upper = bootstrap_intervals(count, total, level, resamples, seed)
+
+    intervals = {}
+    offset = 0
+    for code, table in tables.items():
+        rows = slice(offset, offset + table.height)
+        offset += table.height
+        intervals[code] = table.with_columns(
+            percentage_lower=pl.Series(lower[rows]),
+            percentage_upper=pl.Series(upper[rows]),
+        )
+    return intervals
@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from data_quality import load_clean_responses
+from survey_plan import SurveyPlan, load_survey_plan
+from synthetic_survey import generate_responses
+
+SURVEY_PATH = Path(__file__).parent / "data/survey.json"
+RESPONDENTS = 2_000
+
+
+def export_responses(
+    responses: pl.DataFrame,
+    csv_path: Path,
+) -> tuple[SurveyPlan, pl.LazyFrame]:
+    # the cleaned frame of a synthetic export, as the reports read it
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    responses.write_csv(csv_path, quote_style="always")
+    plan = load_survey_plan(SURVEY_PATH, csv_path)
+    return plan, load_clean_responses(plan, csv_path)
+
+
+@pytest.fixture(scope="session")
+def survey_json() -> dict:
+    with open(SURVEY_PATH) as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="session")
+def responses(survey_json: dict) -> pl.DataFrame:
+    return generate_responses(survey_json, RESPONDENTS)
+
+
+@pytest.fixture(scope="session")
+def survey(
+    responses: pl.DataFrame,
+    tmp_path_factory: pytest.TempPathFactory,
+) -> tuple[SurveyPlan, pl.DataFrame]:
+    csv_path = tmp_path_factory.mktemp("survey") / "results.csv"
+    plan, df = export_responses(responses, csv_path)
+    return plan, df.collect()
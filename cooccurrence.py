@@ -0,0 +1,96 @@
+import typing
+from collections.abc import Iterable
+
+import numpy as np
+import polars as pl
+
+from survey_plan import SELECTED, QuestionPlan
+
+if typing.TYPE_CHECKING:
+    import altair as alt
+
+
+def compute_cooccurrences(
+    questions: Iterable[QuestionPlan],
+    df: pl.LazyFrame,
+) -> dict[str, pl.DataFrame]:
+    """Choice x choice co-occurrence of every multiple question.
+
+    The selections of all respondents are read in a single pass as a boolean
+    matrix, and the co-occurrence counts of a question are the product of its
+    columns with themselves. Alongside the counts, `jaccard` is the share of the
+    respondents selecting either choice who select both, and `lift` is how much
+    more often both are selected than if they were independent.
+    """
+    questions = [q for q in questions if q.type == "multiple" and q.column_ids]
+    if not questions:
+        return {}
+
+    selected = (
+        df.select(
+            (pl.col(column_id) == SELECTED).fill_null(False)
+            for q in questions
+            for column_id in q.column_ids
+        )
+        .collect()
+        .to_numpy()
+        .astype(np.float64)
+    )
+    n_respondents = selected.shape[0]
+
+    cooccurrences = {}
+    offset = 0
+    for question in questions:
+        n_choices = len(question.column_ids)
+        x = selected[:, offset : offset + n_choices]
+        offset += n_choices
+
+        counts = x.T @ x
+        selected_counts = np.diag(counts)
+        union = selected_counts[:, None] + selected_counts[None, :] - counts
+        expected = selected_counts[:, None] * selected_counts[None, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            jaccard = np.where(union > 0, counts / union, 0.0)
+            lift = np.where(expected > 0, counts * n_respondents / expected, 0.0)
+
+        choices = [
+            question.choice_by_column.get(column_id, column_id)
+            for column_id in question.column_ids
+        ]
+        cooccurrences[question.id] = pl.DataFrame(
+            {
+                "choice_a": np.repeat(choices, n_choices),
+                "choice_b": np.tile(choices, n_choices),
+                "count": counts.ravel().astype(np.int64),
+                "jaccard": jaccard.ravel(),
+                "lift": lift.ravel(),
+            }
+        )
+    return cooccurrences
+
+
+def plot_cooccurrence(
+    question: QuestionPlan,
+    cooccurrence: pl.DataFrame,
+) -> "alt.LayerChart":
+    import altair as alt
+
+    # choices ordered by how often they are selected
+    choices = (
+        cooccurrence.filter(pl.col("choice_a") == pl.col("choice_b"))
+        .sort("count", descending=True)["choice_a"]
+        .to_list()
+    )
+    chart = alt.Chart(
+        cooccurrence,
+        title=f"{question.prompt} (choices selected together)",
+    ).encode(
+        x=alt.X("choice_a:N", title=None).sort(choices),
+        y=alt.Y("choice_b:N", title=None).sort(choices),
+        tooltip=["choice_a", "choice_b", "count", "jaccard", "lift"],
+    )
+    return chart.encode(
+        color=alt.Color("jaccard:Q", title="Jaccard", scale=alt.Scale(domain=[0, 1]))
+    ).mark_rect() + chart.encode(text=alt.Text("count:Q")).mark_text(
+        size=5, color="black"
+    )
@@ -0,0 +1,95 @@
+import polars as pl
+
+from survey_plan import SELECTED, SurveyPlan
+from weighting import weighted_len
+
+
+def crosstab(
+    plan: SurveyPlan,
+    df: pl.LazyFrame,
+    question_a: str,
+    question_b: str,
+    by: str | None = None,
+    weight: str | None = None,
+) -> pl.DataFrame:
+    """Count respondents by pair of answers to two single or multiple questions.
+
+    Returns a long table with one column per question, named by its id, and a
+    `count` column. The column of a single question holds its answers, the one of
+    a multiple question holds the text of each selected choice, so a respondent
+    is counted once per pair of selected choices. With `by` (e.g. the `edition`
+    column of several editions), the table is counted for each of its values, in
+    a first column. With a `weight` column, the counts are the sums of the
+    weights of the respondents.
+    """
+    a, b = plan.questions[question_a], plan.questions[question_b]
+    assert a.id != b.id, "crosstab of a question with itself"
+    for q in (a, b):
+        assert q.type in ("single", "multiple"), f"{q.id} is a {q.type} question"
+
+    keys = [] if by is None else [by]
+    weights = [] if weight is None else [weight]
+    count = weighted_len(weight).alias("count")
+    singles = [q.id for q in (a, b) if q.type == "single"]
+    multiples = [q for q in (a, b) if q.type == "multiple"]
+
+    if not multiples:
+        table = df.group_by(*keys, a.id, b.id).agg(count)
+    else:
+        # one unpivot of the choice columns of the multiple question(s), keeping
+        # the selected ones, and one aggregation
+        choice_by_column = {
+            column_id: choice
+            for q in multiples
+            for column_id, choice in q.choice_by_column.items()
+        }
+        question_by_column = {
+            column_id: q.id for q in multiples for column_id in q.column_ids
+        }
+        index = [
+            *keys,
+            *(singles if len(multiples) == 1 else ["respondent"]),
+            *weights,
+        ]
+        selected = (
+            df.with_row_index("respondent")
+            .select(*index, *(c for q in multiples for c in q.column_ids))
+            .unpivot(index=index)
+            .filter(pl.col("value") == SELECTED)
+        )
+        if len(multiples) == 1:
+            table = (
+                selected.group_by(*keys, *singles, "variable")
+                .agg(count)
+                .select(
+                    *keys,
+                    *singles,
+                    pl.col("variable")
+                    .replace_strict(choice_by_column)
+                    .alias(multiples[0].id),
+                    "count",
+                )
+            )
+        else:
+            # pairs of choices selected by the same respondent
+            selected = selected.select(
+                *keys,
+                "respondent",
+                *weights,
+                pl.col("variable").replace_strict(question_by_column).alias("question"),
+                pl.col("variable").replace_strict(choice_by_column).alias("choice"),
+            )
+            table = (
+                selected.filter(pl.col("question") == a.id)
+                .select(*keys, "respondent", *weights, pl.col("choice").alias(a.id))
+                .join(
+                    selected.filter(pl.col("question") == b.id).select(
+                        "respondent", pl.col("choice").alias(b.id)
+                    ),
+                    on="respondent",
+                )
+                .group_by(*keys, a.id, b.id)
+                .agg(count)
+            )
+
+    return table.select(*keys, a.id, b.id, "count").collect()
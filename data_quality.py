@@ -0,0 +1,215 @@
+import json
+from pathlib import Path
+
+import polars as pl
+
+from build_cache import BuildCache
+from survey_data import (
+    LAST_ACTION_COLUMN,
+    RESPONSE_ID_COLUMN,
+    STARTDATE_COLUMN,
+    SUBMITDATE_COLUMN,
+    load_responses,
+    responses_key,
+)
+from survey_plan import NOT_ANSWERED, SELECTED, SurveyPlan
+
+# responses submitted in less time than this are speeders: a fixed threshold, so
+# that the flag of a response does not change as other responses come in
+SPEEDER_SECONDS = 180
+# responses giving the same choice position to at least this share of the single
+# questions they answered, when they answered enough of them, are straight-lined
+STRAIGHT_LINING_SHARE = 0.9
+STRAIGHT_LINING_MIN_ANSWERS = 5
+# responses with fewer answered single, multiple and ranking questions are never
+# duplicates, since mostly skipped surveys are alike: a multiple question is
+# answered when a choice is selected, since viewing it fills its columns with "No"
+DUPLICATE_MIN_QUESTIONS = 5
+# reasons for dropping a response, in the order they are checked
+QUALITY_FLAGS = (
+    "partial",
+    "duplicate",
+    "near_duplicate",
+    "straight_lining",
+    "speeder",
+)
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def clean_cache_path(csv_path: Path | str) -> Path:
+    return Path(csv_path).with_suffix(".clean.arrow")
+
+
+def quality_report_path(csv_path: Path | str) -> Path:
+    return Path(csv_path).with_suffix(".quality.json")
+
+
+def quality_key() -> str:
+    # the cleaned cache is rebuilt when the checks or their thresholds change
+    return BuildCache.key(
+        {
+            "speeder_seconds": SPEEDER_SECONDS,
+            "straight_lining_share": STRAIGHT_LINING_SHARE,
+            "straight_lining_min_answers": STRAIGHT_LINING_MIN_ANSWERS,
+            "duplicate_min_questions": DUPLICATE_MIN_QUESTIONS,
+            "quality_flags": QUALITY_FLAGS,
+        }
+    )
+
+
+def clean_key(plan: SurveyPlan, csv_path: Path | str) -> str:
+    # the cleaned responses hold the enums of the responses cache, so they are
+    # rebuilt along with it
+    return BuildCache.key(quality_key(), responses_key(plan, csv_path))
+
+
+def _is_fresh(plan: SurveyPlan, csv_path: Path | str, cache_path: Path) -> bool:
+    report_path = quality_report_path(csv_path)
+    if not cache_path.exists() or not report_path.exists():
+        return False
+    with open(report_path) as f:
+        return json.load(f).get("key") == clean_key(plan, csv_path)
+
+
+def quality_flags(plan: SurveyPlan, df: pl.LazyFrame) -> pl.LazyFrame:
+    """One row per response: its id and a boolean column per `QUALITY_FLAGS`.
+
+    - `partial`: not submitted.
+    - `duplicate`: same answers, text included, as an earlier submission.
+    - `near_duplicate`: same answers to all single, multiple and ranking
+      questions as an earlier submission, with other text answers. Both only
+      apply to responses answering `DUPLICATE_MIN_QUESTIONS` of these questions.
+    - `straight_lining`: the same choice position for nearly all single questions.
+    - `speeder`: submitted in less than `SPEEDER_SECONDS`.
+
+    All flags are expressions over the same frame, evaluated in a single pass:
+    answer vectors are compared by their hashes, and positions are the enum codes
+    of the answers. Submissions are compared in the order they were submitted, so
+    that the flags of a response never change as later ones are added, which
+    `incremental_stats.CountState` relies on.
+    """
+    questions = list(plan.questions.values())
+    answer_columns = [c for q in questions for c in q.column_ids]
+    closed_columns = [c for q in questions if q.type != "text" for c in q.column_ids]
+    singles = [q for q in questions if q.type == "single" and q.column_ids]
+    schema = df.collect_schema()
+
+    answered = [pl.col(q.id) != NOT_ANSWERED for q in singles]
+    same_position = pl.max_horizontal(
+        pl.sum_horizontal(
+            is_answered & (pl.col(q.id).to_physical() == position)
+            for q, is_answered in zip(singles, answered)
+        )
+        for position in range(max((len(q.choices) for q in singles), default=1))
+    )
+    n_answered = pl.sum_horizontal(answered)
+
+    if STARTDATE_COLUMN in schema and LAST_ACTION_COLUMN in schema:
+        duration = (
+            pl.col(LAST_ACTION_COLUMN).str.to_datetime(DATE_FORMAT, strict=False)
+            - pl.col(STARTDATE_COLUMN).str.to_datetime(DATE_FORMAT, strict=False)
+        ).dt.total_seconds()
+    else:
+        duration = pl.lit(None, dtype=pl.Int64)
+
+    partial = pl.col(SUBMITDATE_COLUMN) == NOT_ANSWERED
+    answered_questions = [
+        pl.any_horizontal(
+            pl.col(c) == SELECTED if q.type == "multiple" else pl.col(c) != NOT_ANSWERED
+            for c in q.column_ids
+        )
+        for q in questions
+        if q.type != "text" and q.column_ids
+    ]
+    comparable = pl.sum_horizontal(answered_questions) >= DUPLICATE_MIN_QUESTIONS
+    return (
+        df.select(
+            RESPONSE_ID_COLUMN,
+            SUBMITDATE_COLUMN,
+            partial.alias("partial"),
+            comparable.alias("comparable"),
+            pl.struct(answer_columns).hash(seed=0).alias("answers_hash"),
+            pl.struct(closed_columns).hash(seed=0).alias("closed_answers_hash"),
+            (
+                (n_answered >= STRAIGHT_LINING_MIN_ANSWERS)
+                & (same_position >= STRAIGHT_LINING_SHARE * n_answered)
+            ).alias("straight_lining"),
+            (duration < SPEEDER_SECONDS).alias("speeder"),
+        )
+        .sort(SUBMITDATE_COLUMN, RESPONSE_ID_COLUMN)
+        .with_columns(
+            # the first submission of identical answers is kept
+            duplicate=~pl.col("answers_hash")
+            .is_first_distinct()
+            .over("partial", "comparable"),
+            near_duplicate=~pl.col("closed_answers_hash")
+            .is_first_distinct()
+            .over("partial", "comparable"),
+        )
+        .select(
+            RESPONSE_ID_COLUMN,
+            pl.col("partial"),
+            pl.col("duplicate") & pl.col("comparable") & ~pl.col("partial"),
+            pl.col("near_duplicate")
+            & ~pl.col("duplicate")
+            & pl.col("comparable")
+            & ~pl.col("partial"),
+            pl.col("straight_lining") & ~pl.col("partial"),
+            pl.col("speeder").fill_null(False) & ~pl.col("partial"),
+        )
+    )
+
+
+def build_clean_cache(
+    plan: SurveyPlan,
+    csv_path: Path | str,
+    cache_path: Path | str,
+):
+    # the kept responses, in the same memory-mappable format as the responses
+    # cache, and the flagged response ids by reason next to it
+    df = load_responses(plan, csv_path)
+    flags = quality_flags(plan, df).collect()
+    kept = flags.filter(~pl.any_horizontal(QUALITY_FLAGS))[RESPONSE_ID_COLUMN]
+
+    tmp_path = Path(cache_path).with_suffix(".tmp")
+    # IPC scans are not streamed, but the enum-encoded answers are compact
+    df.filter(pl.col(RESPONSE_ID_COLUMN).is_in(kept)).collect().write_ipc(
+        tmp_path, compression="uncompressed"
+    )
+    tmp_path.replace(cache_path)
+
+    report = {
+        "key": clean_key(plan, csv_path),
+        "responses": flags.height,
+        "kept": kept.len(),
+        **{
+            flag: flags.filter(flag)[RESPONSE_ID_COLUMN].to_list()
+            for flag in QUALITY_FLAGS
+        },
+    }
+    with open(quality_report_path(csv_path), "w") as f:
+        json.dump(obj=report, fp=f)
+    print(
+        f"{Path(csv_path).name}: kept {report['kept']} of {report['responses']}"
+        " responses, dropped "
+        + ", ".join(f"{len(report[flag])} {flag}" for flag in QUALITY_FLAGS)
+    )
+
+
+def load_clean_responses(
+    plan: SurveyPlan,
+    csv_path: Path | str = "data/results-survey2024.csv",
+) -> pl.LazyFrame:
+    """Scan the submitted responses that pass all `quality_flags` checks.
+
+    Both reports read this frame, cached next to the responses cache as
+    `<export>.clean.arrow` and rebuilt whenever the export, the plan or the
+    thresholds above changed. The ids of the dropped responses are listed by
+    reason in `<export>.quality.json`.
+    """
+    # (re)builds the responses cache if needed
+    load_responses(plan, csv_path)
+    cache_path = clean_cache_path(csv_path)
+    if not _is_fresh(plan, csv_path, cache_path):
+        build_clean_cache(plan, csv_path, cache_path)
+    return pl.scan_ipc(cache_path, memory_map=True)
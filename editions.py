@@ -0,0 +1,156 @@
+import json
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import polars as pl
+
+from data_quality import load_clean_responses
+from survey_data import answer_dtypes, find_invalid_answers
+from survey_plan import NOT_ANSWERED, QuestionPlan, SurveyPlan, load_survey_plan
+
+# the column holding the edition of each response in a multi-edition frame
+EDITION_COLUMN = "edition"
+
+
+@dataclass(frozen=True)
+class Edition:
+    # year of the survey, e.g. "2023"
+    name: str
+    survey_path: Path
+    csv_path: Path
+    # question id in this edition -> id in the reference edition, for the
+    # questions whose id changed (the others keep their id)
+    question_ids: Mapping[str, str] = field(default_factory=dict)
+    # choice text in this edition -> text in the reference edition, by reference
+    # question id
+    choices: Mapping[str, Mapping[str, str]] = field(default_factory=dict)
+
+
+def read_editions(path: Path | str) -> list[Edition]:
+    # a JSON list of editions, paths relative to the working directory:
+    # [{"name": "2023", "survey_path": ..., "csv_path": ..., "question_ids": {...}}]
+    with open(path) as f:
+        return [
+            Edition(
+                name=str(edition["name"]),
+                survey_path=Path(edition["survey_path"]),
+                csv_path=Path(edition["csv_path"]),
+                question_ids=edition.get("question_ids", {}),
+                choices=edition.get("choices", {}),
+            )
+            for edition in json.load(f)
+        ]
+
+
+def _column_mapping(
+    question: QuestionPlan,
+    plan: SurveyPlan,
+    reference_question: QuestionPlan,
+    reference: SurveyPlan,
+    choices: Mapping[str, str],
+) -> dict[str, str]:
+    # edition column id -> reference column id: the `qNN[SQxxx]` columns of
+    # multiple questions by the text of their choice, since choices are added and
+    # removed between editions, the others (including `qNN[other]`) by their suffix
+    reference_columns = {
+        choice: column_id
+        for column_id, choice in reference_question.choice_by_column.items()
+    }
+    reference_column_ids = set(reference.column_ids.values())
+    mapping = {}
+    for column_id in plan.column_ids.values():
+        if column_id[:3] != question.id:
+            continue
+        if column_id in question.choice_by_column:
+            choice = question.choice_by_column[column_id]
+            reference_column = reference_columns.get(choices.get(choice, choice))
+        else:
+            reference_column = reference_question.id + column_id[3:]
+        if reference_column in reference_column_ids:
+            mapping[column_id] = reference_column
+    return mapping
+
+
+def _edition_frame(
+    edition: Edition,
+    plan: SurveyPlan,
+    reference: SurveyPlan,
+) -> pl.LazyFrame:
+    # answer columns renamed to their reference ids, with the choices of single and
+    # ranking questions renamed to their reference text
+    columns, values = {}, []
+    for question in plan.questions.values():
+        reference_id = edition.question_ids.get(question.id, question.id)
+        if reference_id not in reference.questions:
+            continue
+        reference_question = reference.questions[reference_id]
+        if reference_question.type != question.type:
+            raise ValueError(
+                f"{edition.name} {question.id} is a {question.type} question, "
+                f"{reference_id} a {reference_question.type} one"
+            )
+        choices = edition.choices.get(reference_id, {})
+        mapping = _column_mapping(
+            question, plan, reference_question, reference, choices
+        )
+        columns |= mapping
+        if question.type in ("single", "ranking") and choices:
+            values += [
+                pl.col(column_id).replace(dict(choices))
+                for column_id in mapping
+                if column_id in question.column_ids
+            ]
+
+    # answer columns of questions missing from the reference edition are dropped
+    dropped = set(plan.column_ids.values()) - set(columns)
+    return (
+        load_clean_responses(plan, edition.csv_path)
+        .drop(*dropped)
+        .with_columns(pl.col(column_id).cast(pl.String) for column_id in columns)
+        .with_columns(*values)
+        .rename(columns)
+        .with_columns(pl.lit(edition.name).alias(EDITION_COLUMN))
+    )
+
+
+def load_editions(editions: Sequence[Edition]) -> tuple[SurveyPlan, pl.LazyFrame]:
+    """Scan the exports of several editions of the survey as a single frame.
+
+    The last edition is the reference: the answer columns of the others are
+    renamed to its question ids and choice texts, and the returned plan is its
+    plan. The exports are cleaned and converted to their Arrow caches in parallel
+    threads, then scanned lazily and unioned, with the name of their edition in
+    an `edition` column, so that any aggregation can group by it. Questions that
+    an edition did not ask are "Not answered" by all of its respondents.
+    """
+    assert editions, "No edition to load"
+    assert len({e.name for e in editions}) == len(editions), "Duplicate editions"
+    plans = [load_survey_plan(e.survey_path, e.csv_path) for e in editions]
+    reference = plans[-1]
+    with ThreadPoolExecutor(len(editions)) as executor:
+        frames = list(
+            executor.map(
+                lambda edition, plan: _edition_frame(edition, plan, reference),
+                editions,
+                plans,
+            )
+        )
+
+    dtypes = answer_dtypes(reference)
+    answer_columns = list(reference.column_ids.values())
+    df = pl.concat(frames, how="diagonal_relaxed", parallel=True).with_columns(
+        pl.col(answer_columns).fill_null(NOT_ANSWERED),
+        pl.col(EDITION_COLUMN).cast(pl.Enum([e.name for e in editions])),
+    )
+    invalid = find_invalid_answers(reference, df)
+    if invalid:
+        raise ValueError(
+            "Answers not in the choices of the reference edition: "
+            + "; ".join(
+                f"{question_id}: {', '.join(map(repr, values))}"
+                for question_id, values in invalid.items()
+            )
+        )
+    return reference, df.cast(dtypes)
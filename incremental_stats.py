@@ -0,0 +1,100 @@
+import json
+from collections.abc import Iterable
+from pathlib import Path
+
+import polars as pl
+
+from batch_stats import (
+    BATCHED_QUESTION_TYPES,
+    answers_from_counts,
+    count_answers,
+    merge_counts,
+)
+from build_cache import BuildCache
+from data_quality import quality_key
+from survey_data import RESPONSE_ID_COLUMN, SUBMITDATE_COLUMN
+from survey_plan import QuestionPlan
+
+
+class CountState:
+    """Answer counts of the batched questions, up to the last processed submission.
+
+    The counts are stored in `output/.counts_{name}.parquet`, and the position of
+    the last run in `output/.counts_{name}.json`: the latest submit date, the ids
+    of the responses submitted at that date, and the number of responses counted.
+    A run only counts the responses submitted since then and merges them in. The
+    state is started over when the questions changed, or when the export has
+    fewer submitted responses than counted (it was replaced rather than grown),
+    or when the data quality checks changed.
+    """
+
+    def __init__(self, output_path: Path, name: str):
+        self.counts_path = output_path / f".counts_{name}.parquet"
+        self.meta_path = output_path / f".counts_{name}.json"
+
+    def _load(self, key: str) -> tuple[pl.DataFrame | None, dict]:
+        if not (self.counts_path.exists() and self.meta_path.exists()):
+            return None, {}
+        with open(self.meta_path) as f:
+            meta = json.load(f)
+        if meta["key"] != key:
+            return None, {}
+        return pl.read_parquet(self.counts_path), meta
+
+    def _save(self, counts: pl.DataFrame, meta: dict):
+        self.counts_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.counts_path.with_suffix(".tmp")
+        counts.write_parquet(tmp_path)
+        tmp_path.replace(self.counts_path)
+        with open(self.meta_path, "w") as f:
+            json.dump(obj=meta, fp=f)
+
+    def update(
+        self,
+        questions: Iterable[QuestionPlan],
+        df: pl.LazyFrame,
+    ) -> dict[str, pl.DataFrame]:
+        """Count the new submitted responses of `df`, and return all answers.
+
+        `df` holds the submitted responses only. The answers are the ones of
+        `compute_batched_stats` over all of them.
+        """
+        questions = [q for q in questions if q.type in BATCHED_QUESTION_TYPES]
+        if not questions:
+            return {}
+        key = BuildCache.key(
+            [(dict(q.question), q.column_ids) for q in questions], quality_key()
+        )
+        counts, meta = self._load(key)
+
+        submitted = df.select(pl.len()).collect().item()
+        if counts is not None and submitted >= meta["respondents"]:
+            last_date, last_ids = meta["last_submitdate"], meta["last_ids"]
+            new = df.filter(
+                (pl.col(SUBMITDATE_COLUMN) > last_date)
+                | (
+                    (pl.col(SUBMITDATE_COLUMN) == last_date)
+                    & ~pl.col(RESPONSE_ID_COLUMN).is_in(last_ids)
+                )
+            )
+        else:
+            counts, meta, new = None, {"key": key, "respondents": 0}, df
+
+        # the new responses are materialized, since they are scanned both by the
+        # counting and by the bookkeeping below
+        new = new.collect()
+        if new.height > 0 or counts is None:
+            previous = [] if counts is None else [counts]
+            counts = merge_counts(*previous, count_answers(questions, new.lazy()))
+        if new.height > 0:
+            last_date = new[SUBMITDATE_COLUMN].max()
+            if meta.get("last_submitdate") != last_date:
+                meta["last_ids"] = []
+            meta["last_ids"] += new.filter(pl.col(SUBMITDATE_COLUMN) == last_date)[
+                RESPONSE_ID_COLUMN
+            ].to_list()
+            meta["last_submitdate"] = last_date
+            meta["respondents"] += new.height
+            self._save(counts, meta)
+
+        return answers_from_counts(questions, counts)
@@ -0,0 +1,143 @@
+import json
+import re
+from collections.abc import Collection
+from pathlib import Path
+
+import polars as pl
+
+from render import RenderJob, chart_spec
+
+# "files" writes one answers JSON per code, "store" all of them to one NDJSON file
+OUTPUT_MODES = ("files", "store")
+
+
+def is_selected(code: str, only: Collection[str] | None) -> bool:
+    # an output is selected by its code (`q08`, `q08_q09`, `cooc_q07`) or by the id
+    # of any of its questions
+    if only is None:
+        return True
+    return code in only or any(part in only for part in code.split("_"))
+
+
+class DatasetStore:
+    """The aggregate tables and chart datasets of a run, in a single NDJSON file.
+
+    Each line is a Vega-Lite named data source, `{"name": ..., "values": [...]}`,
+    keyed by question or chart code, so that the chart specs written in this mode
+    refer to them by name instead of inlining their data. Datasets that a run
+    neither writes nor reads are dropped by `save`, unless it is a partial run.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.datasets: dict[str, list[dict]] = {}
+        if path.exists():
+            with open(path) as f:
+                for line in f:
+                    dataset = json.loads(line)
+                    self.datasets[dataset["name"]] = dataset["values"]
+        self.used: set[str] = set()
+
+    def keep(self, name: str) -> bool:
+        # whether the store has `name`, which is then kept by `save`
+        if name not in self.datasets:
+            return False
+        self.used.add(name)
+        return True
+
+    def put(self, name: str, values: list[dict]):
+        self.datasets[name] = values
+        self.used.add(name)
+
+    def get(self, name: str) -> pl.DataFrame:
+        self.used.add(name)
+        return pl.DataFrame(self.datasets[name])
+
+    def named_spec(self, code: str, spec: dict) -> dict:
+        # the inline datasets of `spec` move to the store: the one holding the
+        # answers of `code` is the answers table itself, the others (derived for
+        # the chart) are kept under altair's content-hashed names
+        names = {}
+        for name, values in spec.get("datasets", {}).items():
+            names[name] = code if self.datasets.get(code) == values else name
+            self.put(names[name], values)
+        return _rename_datasets(
+            {key: value for key, value in spec.items() if key != "datasets"}, names
+        )
+
+    def save(self, partial: bool = False):
+        names = self.datasets if partial else sorted(self.used)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            for name in names:
+                f.write(json.dumps({"name": name, "values": self.datasets[name]}))
+                f.write("\n")
+        tmp_path.replace(self.path)
+
+
+def _rename_datasets(spec, names: dict[str, str]):
+    # `{"data": {"name": ...}}` of the top level chart and of its layers
+    if isinstance(spec, list):
+        return [_rename_datasets(item, names) for item in spec]
+    if not isinstance(spec, dict):
+        return spec
+    renamed = {key: _rename_datasets(value, names) for key, value in spec.items()}
+    data = renamed.get("data")
+    if isinstance(data, dict) and data.get("name") in names:
+        renamed["data"] = {**data, "name": names[data["name"]]}
+    return renamed
+
+
+def answers_path(output_path: Path, code: str) -> Path:
+    return output_path / f"answers_{code}.json"
+
+
+def segment_path(output_path: Path, segment: str, value: str) -> Path:
+    # output/<segment>/<value>/, with the value made safe for a directory name
+    return output_path / segment / re.sub(r"[^\w.-]+", "_", value).strip("_")
+
+
+def has_answers(code: str, output_path: Path, store: DatasetStore | None) -> bool:
+    if store is not None:
+        return store.keep(code)
+    return answers_path(output_path, code).exists()
+
+
+def read_answers(
+    code: str,
+    output_path: Path,
+    store: DatasetStore | None = None,
+) -> pl.DataFrame:
+    if store is not None:
+        return store.get(code)
+    return pl.read_json(answers_path(output_path, code))
+
+
+def write_answers(
+    answers: pl.DataFrame,
+    code: str,
+    output_path: Path,
+    store: DatasetStore | None = None,
+) -> Path:
+    # returns the file the answers are in, for the build cache
+    if store is not None:
+        store.put(code, answers.to_dicts())
+        return store.path
+    path = answers_path(output_path, code)
+    output_path.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(obj=answers.to_dicts(), fp=f)
+    return path
+
+
+def chart_job(
+    code: str,
+    chart,
+    output_path: Path,
+    store: DatasetStore | None = None,
+) -> RenderJob:
+    # images are rendered from the full spec, only the JSON spec refers to the store
+    spec = chart_spec(chart)
+    json_spec = None if store is None else store.named_spec(code, spec)
+    return RenderJob(code=code, spec=spec, output_path=output_path, json_spec=json_spec)
@@ -0,0 +1,141 @@
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# seconds between two samples of the resident set size during a stage
+RSS_SAMPLE_INTERVAL = 0.005
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb() -> float | None:
+    # resident set size of the process now, where /proc has it (Linux)
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+
+
+class _RssSampler:
+    # the peak resident set size between its start and `stop`, sampled by a
+    # thread, or the process high-water mark where the current size is unknown
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.start_mb = current_rss_mb()
+        self.peak_mb = self.start_mb
+        self._stopped = threading.Event()
+        self._thread = None
+        if self.start_mb is None:
+            self.start_mb = peak_rss_mb()
+        else:
+            self._thread = threading.Thread(
+                target=self._sample, args=(interval,), daemon=True
+            )
+            self._thread.start()
+
+    def _sample(self, interval: float):
+        while not self._stopped.wait(interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def stop(self) -> tuple[float, float]:
+        # (peak, peak - size at the start)
+        if self._thread is None:
+            peak = peak_rss_mb()
+        else:
+            self._stopped.set()
+            self._thread.join()
+            peak = max(self.peak_mb, current_rss_mb())
+        return peak, peak - self.start_mb
+
+
+class Profiler:
+    """Wall time, CPU time and memory of each stage of a run, by question.
+
+    Memory is the resident set size of the process, which also accounts for the
+    allocations of polars and vl-convert, sampled every `RSS_SAMPLE_INTERVAL`
+    while a stage runs: `peak_rss_mb` is its peak during the stage, and
+    `rss_growth_mb` how far above the size at the start of the stage it went.
+    Without /proc (macOS), both come from the high-water mark of the process,
+    so a stage staying below an earlier peak shows no growth.
+    """
+
+    def __init__(self):
+        self.records: list[dict] = []
+
+    @contextmanager
+    def stage(self, stage: str, code: str | None = None):
+        sampler = _RssSampler()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall_s, cpu_s = time.perf_counter() - wall, time.process_time() - cpu
+            peak, growth = sampler.stop()
+            self.record(
+                stage,
+                code,
+                wall_s=wall_s,
+                cpu_s=cpu_s,
+                peak_rss_mb=peak,
+                rss_growth_mb=growth,
+            )
+
+    def record(self, stage: str, code: str | None, **measures: float):
+        self.records.append({"stage": stage, "code": code, **measures})
+
+    def summary(self) -> list[dict]:
+        stages: dict[str, dict] = {}
+        for record in self.records:
+            summary = stages.setdefault(
+                record["stage"],
+                {
+                    "stage": record["stage"],
+                    "count": 0,
+                    "wall_s": 0.0,
+                    "cpu_s": 0.0,
+                    "peak_rss_mb": 0.0,
+                    "rss_growth_mb": 0.0,
+                },
+            )
+            summary["count"] += 1
+            summary["wall_s"] += record["wall_s"]
+            summary["cpu_s"] += record["cpu_s"]
+            for measure in ("peak_rss_mb", "rss_growth_mb"):
+                summary[measure] = max(summary[measure], record.get(measure, 0.0))
+        return sorted(stages.values(), key=lambda s: s["wall_s"], reverse=True)
+
+    def write(self, path: Path, run: str):
+        # the runs of both scripts share the file, one entry each
+        path.parent.mkdir(parents=True, exist_ok=True)
+        runs = {}
+        if path.exists():
+            with open(path) as f:
+                runs = json.load(f)
+        runs[run] = {"summary": self.summary(), "records": self.records}
+        with open(path, "w") as f:
+            json.dump(obj=runs, fp=f)
+
+    def print_summary(self):
+        print(
+            f"{'stage':<16} {'count':>5} {'wall (s)':>9} {'cpu (s)':>9}"
+            f" {'peak (MB)':>9} {'rss+ (MB)':>9}"
+        )
+        for s in self.summary():
+            print(
+                f"{s['stage']:<16} {s['count']:>5} {s['wall_s']:>9.3f}"
+                f" {s['cpu_s']:>9.3f} {s['peak_rss_mb']:>9.1f}"
+                f" {s['rss_growth_mb']:>9.1f}"
+            )
+
+
+profiler = Profiler()
@@ -0,0 +1,164 @@
+import argparse
+import json
+import traceback
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import polars as pl
+
+from basic_charts import compute_stats, load_data, plot_answers
+from crosstab import crosstab
+from render import chart_spec
+from survey_plan import QuestionPlan, SurveyPlan
+from text_normalization import count_text_answers
+
+# number of query results kept in memory
+QUERY_CACHE_SIZE = 256
+ENDPOINTS = ("stats", "crosstab", "filter")
+
+
+def plot_crosstab(plan: SurveyPlan, table: pl.DataFrame):
+    import altair as alt
+
+    # counts of each pair of answers, in the choice order of both questions
+    a, b = (plan.questions[column] for column in table.columns[:2])
+    return (
+        alt.Chart(table, title=f"{a.prompt} x {b.prompt}")
+        .mark_rect()
+        .encode(
+            x=alt.X(f"{a.id}:N", title=a.prompt).sort(list(a.choices)),
+            y=alt.Y(f"{b.id}:N", title=b.prompt).sort(list(b.choices)),
+            color=alt.Color("count:Q", title="Count"),
+            tooltip=list(table.columns),
+        )
+    )
+
+
+class SurveyQueries:
+    """The answers of the survey, loaded once, queried by endpoint and parameters.
+
+    `stats?q=q18` gives the answers of a question and `crosstab?a=q08&b=q14` the
+    counts of each pair of answers to two questions, both with their Vega-Lite
+    spec. `filter` takes either of these parameters, and restricts the
+    respondents to the ones whose answers match every other parameter, e.g.
+    `filter?q=q18&q01=Northern Europe&q07[SQ003]=Yes`. Results are kept in an LRU
+    cache keyed by the query.
+    """
+
+    def __init__(self, cache_size: int = QUERY_CACHE_SIZE):
+        plan, df, text_answers = load_data()
+        self.plan = plan
+        # the submitted responses are read once, and queried from memory
+        self.df = df.collect()
+        self.text_answers = text_answers
+        self.answer_columns = set(plan.column_ids.values())
+        self.query = lru_cache(maxsize=cache_size)(self._query)
+
+    def _filter(self, filters: tuple[tuple[str, tuple[str, ...]], ...]) -> pl.LazyFrame:
+        unknown = [column for column, _ in filters if column not in self.answer_columns]
+        if unknown:
+            raise ValueError(f"Unknown columns {', '.join(unknown)}")
+        df = self.df.lazy()
+        for column, values in filters:
+            df = df.filter(pl.col(column).is_in(values))
+        return df
+
+    def _question(self, question_id: str) -> QuestionPlan:
+        if question_id not in self.plan.questions:
+            raise ValueError(f"Unknown question {question_id}")
+        return self.plan.questions[question_id]
+
+    def _query(
+        self,
+        endpoint: str,
+        params: tuple[tuple[str, tuple[str, ...]], ...],
+    ) -> dict:
+        # `params` is sorted and hashable, for the LRU cache
+        if endpoint not in ENDPOINTS:
+            raise LookupError(f"Unknown endpoint {endpoint}")
+        query = dict(params)
+        match endpoint:
+            case "stats":
+                keys = ("q",)
+            case "crosstab":
+                keys = ("a", "b")
+            case _:
+                keys = ("q",) if "q" in query else ("a", "b")
+        missing = [key for key in keys if key not in query]
+        if missing:
+            raise ValueError(f"Missing parameters {', '.join(missing)}")
+        filters = tuple((key, values) for key, values in params if key not in keys)
+        if filters and endpoint != "filter":
+            raise ValueError(f"Unexpected parameters for {endpoint}: {filters[0][0]}")
+        df = self._filter(filters)
+
+        if keys == ("q",):
+            question = self._question(query["q"][0])
+            # text answers are counted again among the filtered respondents
+            text_answers = (
+                count_text_answers([question], df) if filters else self.text_answers
+            )
+            answers = compute_stats(question, df, text_answers)
+            chart = plot_answers(question, answers)
+        else:
+            a, b = (self._question(query[key][0]) for key in keys)
+            answers = crosstab(self.plan, df, a.id, b.id)
+            chart = plot_crosstab(self.plan, answers)
+        return {
+            "query": {key: list(values) for key, values in params},
+            "respondents": df.select(pl.len()).collect().item(),
+            "answers": answers.to_dicts(),
+            "spec": chart_spec(chart),
+        }
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    queries: SurveyQueries
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = tuple(
+            sorted(
+                (key, tuple(values))
+                for key, values in parse_qs(url.query, keep_blank_values=True).items()
+            )
+        )
+        try:
+            status, body = 200, self.queries.query(url.path.strip("/"), params)
+        except LookupError as e:
+            status, body = 404, {"error": str(e)}
+        except (
+            ValueError,
+            AssertionError,
+            NotImplementedError,
+            pl.exceptions.PolarsError,
+        ) as e:
+            status, body = 400, {"error": str(e)}
+        except Exception as e:  # noqa: BLE001
+            # any other failure is answered too, rather than dropping the connection
+            self.log_error("%s", traceback.format_exc())
+            status, body = 500, {"error": f"Internal error: {e!r}"}
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8000):
+    QueryHandler.queries = SurveyQueries()
+    with ThreadingHTTPServer((host, port), QueryHandler) as server:
+        print(f"serving on http://{host}:{port}/, e.g. /stats?q=q18")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve the answers and crosstabs of the survey as JSON."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    serve(args.host, args.port)
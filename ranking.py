@@ -0,0 +1,174 @@
+import re
+import typing
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+import polars as pl
+
+from survey_plan import NOT_ANSWERED, QuestionPlan
+
+if typing.TYPE_CHECKING:
+    import altair as alt
+
+# top-k shares reported for every choice, capped at the number of ranks
+TOP_K = (1, 3, 5)
+
+
+@dataclass(frozen=True)
+class RankingStats:
+    # one row per choice: Borda score, mean rank, top-k shares
+    scores: pl.DataFrame
+    # one row per (choice_a, choice_b): respondents ranking a above b
+    pairwise: pl.DataFrame
+
+
+def rank_matrix(question: QuestionPlan, df: pl.LazyFrame) -> np.ndarray:
+    """The rank (1 for first) given by each respondent to each choice.
+
+    One row per respondent and one column per choice of `question`, with 0 for
+    the choices a respondent did not rank. Built from the enum codes of the rank
+    columns, without reshaping the frame.
+    """
+    choices = [c for c in question.choices if c != NOT_ANSWERED]
+    ranks = [int(re.search(r"\[(\d+)\]", c).group(1)) for c in question.column_ids]
+    codes = (
+        df.select(
+            pl.col(column_id).cast(pl.Enum(question.choices)).to_physical()
+            for column_id in question.column_ids
+        )
+        .collect()
+        .to_numpy()
+    )
+    # enum code -> choice column, with an extra column for unanswered ranks
+    choice_index = np.array(
+        [choices.index(c) if c in choices else len(choices) for c in question.choices]
+    )
+    matrix = np.zeros((codes.shape[0], len(choices) + 1), dtype=np.int16)
+    respondents = np.arange(codes.shape[0])
+    # from the last rank to the first, so that a choice ranked twice keeps its best
+    for column, rank in sorted(enumerate(ranks), key=lambda r: -r[1]):
+        matrix[respondents, choice_index[codes[:, column]]] = rank
+    return matrix[:, : len(choices)]
+
+
+def compute_rankings(
+    questions: Iterable[QuestionPlan],
+    df: pl.LazyFrame,
+    weight: str | None = None,
+) -> dict[str, RankingStats]:
+    """Borda scores, mean ranks, top-k shares and pairwise preferences.
+
+    All metrics of a ranking question come from its rank matrix: the Borda
+    score gives `n_ranks - rank + 1` points per ranking, shares are among the
+    respondents ranking at least one choice, and `pairwise` counts, for every
+    ordered pair of choices, the respondents ranking the first above the second
+    (an unranked choice is below all ranked ones). With a `weight` column, each
+    respondent counts for their weight in all of them.
+    """
+    weights = None
+    if weight is not None:
+        weights = df.select(weight).collect().to_series().to_numpy()
+
+    def total(values: np.ndarray) -> np.ndarray:
+        # sums over respondents, of each value times their weight
+        return values.sum(axis=0) if weights is None else weights @ values
+
+    rankings = {}
+    for question in questions:
+        if question.type != "ranking" or not question.column_ids:
+            continue
+        choices = [c for c in question.choices if c != NOT_ANSWERED]
+        matrix = rank_matrix(question, df)
+        # from the question rather than the answers, so that the Borda scale and
+        # the top-k columns do not depend on whether anybody used the last rank
+        n_ranks = len(question.column_ids)
+        ranked = matrix > 0
+        n_respondents = max(total(ranked.any(axis=1)), 1)
+        points = np.where(ranked, n_ranks + 1 - matrix, 0)
+        ranked_count = total(ranked)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_rank = np.where(ranked_count > 0, total(matrix) / ranked_count, 0)
+        scores = pl.DataFrame(
+            {
+                "choice": choices,
+                "ranked_count": ranked_count,
+                "borda": total(points),
+                "borda_mean": total(points) / n_respondents,
+                "mean_rank": mean_rank,
+                **{
+                    f"top_{k}": total(ranked & (matrix <= k)) / n_respondents
+                    for k in TOP_K
+                    if k <= n_ranks
+                },
+            }
+        ).sort("borda", descending=True)
+
+        # respondents ranking a above b: sum over ranks r of
+        # [rank of a == r] x [rank of b > r or unranked], one product per rank,
+        # weighted on the left side
+        unranked_last = np.where(ranked, matrix, n_ranks + 1).astype(np.float32)
+        preferred = np.zeros((len(choices), len(choices)), dtype=np.float64)
+        for rank in range(1, n_ranks + 1):
+            ranked_at = (unranked_last == rank).astype(np.float32)
+            if weights is not None:
+                ranked_at *= weights[:, None].astype(np.float32)
+            preferred += ranked_at.T @ (unranked_last > rank).astype(np.float32)
+        if weights is None:
+            preferred = preferred.round().astype(np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            contested = preferred + preferred.T
+            share = np.where(contested > 0, preferred / contested, 0.0)
+        pairwise = pl.DataFrame(
+            {
+                "choice_a": np.repeat(choices, len(choices)),
+                "choice_b": np.tile(choices, len(choices)),
+                "count": preferred.ravel(),
+                "share": share.ravel(),
+            }
+        )
+        rankings[question.id] = RankingStats(scores=scores, pairwise=pairwise)
+    return rankings
+
+
+def plot_borda(question: QuestionPlan, scores: pl.DataFrame) -> "alt.Chart":
+    import altair as alt
+
+    return (
+        alt.Chart(scores, title=f"{question.prompt} (Borda score)")
+        .mark_bar()
+        .encode(
+            y=alt.Y("choice:N", title=None).sort("-x"),
+            x=alt.X("borda_mean:Q", title="Mean Borda points per respondent"),
+            tooltip=list(scores.columns),
+        )
+    )
+
+
+def plot_pairwise(question: QuestionPlan, pairwise: pl.DataFrame) -> "alt.Chart":
+    import altair as alt
+
+    # choices ordered by how many pairwise comparisons they win
+    choices = (
+        pairwise.group_by("choice_a")
+        .agg((pl.col("share") > 0.5).sum().alias("wins"))
+        .sort("wins", "choice_a", descending=[True, False])["choice_a"]
+        .to_list()
+    )
+    return (
+        alt.Chart(
+            pairwise.filter(pl.col("choice_a") != pl.col("choice_b")),
+            title=f"{question.prompt} (share preferring the row over the column)",
+        )
+        .mark_rect()
+        .encode(
+            x=alt.X("choice_b:N", title=None).sort(choices),
+            y=alt.Y("choice_a:N", title=None).sort(choices),
+            color=alt.Color(
+                "share:Q",
+                title="Preferred",
+                scale=alt.Scale(domain=[0, 1], scheme="redblue"),
+            ),
+            tooltip=["choice_a", "choice_b", "count", "share"],
+        )
+    )
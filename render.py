@@ -0,0 +1,171 @@
+import json
+import multiprocessing
+import os
+import typing
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+from profiling import Profiler, profiler
+
+if typing.TYPE_CHECKING:
+    import altair as alt
+
+RENDER_FORMATS = ("png", "svg", "json")
+# formats drawn by vl-convert, the others are written without it
+RASTER_FORMATS = ("png", "svg")
+# number of chart rendering processes, defaults to one per core; 0 workers, from
+# the environment or as an argument, also means this default
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", "0")) or os.cpu_count() or 1
+
+
+@dataclass(frozen=True)
+class RenderPreset:
+    formats: tuple[str, ...]
+    scale_factor: float = 3
+
+
+# "publish" renders print-quality PNGs, "draft" only the SVG and the spec, and
+# "spec-only" the Vega-Lite spec alone, without starting vl-convert
+RENDER_PRESETS = {
+    "draft": RenderPreset(("svg", "json"), scale_factor=1),
+    "publish": RenderPreset(RENDER_FORMATS, scale_factor=3),
+    "spec-only": RenderPreset(("json",)),
+}
+
+
+# compared and hashed by identity: jobs of different output paths share codes
+@dataclass(frozen=True, eq=False)
+class RenderJob:
+    code: str
+    spec: dict
+    output_path: Path
+    # written by the "json" format instead of `spec`, when set
+    json_spec: dict | None = None
+
+
+def chart_spec(chart: "alt.TopLevelMixin") -> dict:
+    import altair as alt
+
+    # same as what `chart.save` serializes: all data inlined in the spec
+    with (
+        alt.data_transformers.enable("default"),
+        alt.data_transformers.disable_max_rows(),
+    ):
+        return chart.to_dict(context={"pre_transform": False})
+
+
+def _vl_version() -> str:
+    # vl-convert's version string (of the form 'v5_20') of the altair schema
+    import altair as alt
+
+    return "_".join(alt.SCHEMA_VERSION.split(".")[:2])
+
+
+def render_outputs(
+    job: RenderJob,
+    formats: tuple[str, ...] = RENDER_FORMATS,
+) -> dict[str, Path]:
+    names = {
+        "png": f"chart_plot_{job.code}.png",
+        "svg": f"chart_plot_{job.code}.svg",
+        "json": f"chart_json_{job.code}.json",
+    }
+    return {format: job.output_path / names[format] for format in formats}
+
+
+def _start_converter(vl_version: str | None):
+    # vl-convert keeps one converter per process, which takes most of a second to
+    # start: each worker starts it once, before its first chart
+    import vl_convert as vlc
+
+    vlc.vegalite_to_svg({"mark": "point"}, vl_version=vl_version)
+
+
+def render_job(
+    job: RenderJob,
+    formats: tuple[str, ...] = RENDER_FORMATS,
+    scale_factor: float = 3,
+    vl_version: str | None = None,
+) -> list[dict]:
+    # runs in the worker processes, which only need vl-convert, and returns the
+    # time spent on each format
+    import vl_convert as vlc
+
+    worker_profiler = Profiler()
+    job.output_path.mkdir(parents=True, exist_ok=True)
+    for format, path in render_outputs(job, formats).items():
+        with worker_profiler.stage(f"render_{format}", job.code):
+            match format:
+                case "png":
+                    png = vlc.vegalite_to_png(
+                        job.spec, vl_version=vl_version, scale=scale_factor
+                    )
+                    with open(path, "wb") as f:
+                        f.write(png)
+                case "svg":
+                    svg = vlc.vegalite_to_svg(job.spec, vl_version=vl_version)
+                    with open(path, "w") as f:
+                        f.write(svg)
+                case "json":
+                    with open(path, "w") as f:
+                        json.dump(
+                            obj=job.spec if job.json_spec is None else job.json_spec,
+                            fp=f,
+                        )
+    return worker_profiler.records
+
+
+def _executor(workers: int, vl_version: str | None) -> Executor:
+    # spawned rather than forked: the parent already runs the polars thread pool,
+    # which a fork may deadlock, and the scripts are safe to import again since
+    # their notebook cells only run as `__main__`
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_start_converter,
+        initargs=(vl_version,),
+    )
+
+
+def render_charts(
+    jobs: list[RenderJob],
+    workers: int = RENDER_WORKERS,
+    formats: tuple[str, ...] = RENDER_FORMATS,
+    scale_factor: float = 3,
+) -> dict[RenderJob, Exception]:
+    """Render the charts of `jobs` to PNG, SVG and JSON files in a process pool.
+
+    Each worker keeps its vl-convert converter for all the charts it renders.
+    Without PNG nor SVG in `formats`, the specs are written in this process. A
+    chart failing to render does not stop the others: the errors are printed and
+    returned by job. The time spent in the workers is recorded in
+    `profiling.profiler`.
+    """
+    vl_version = _vl_version()
+    errors: dict[RenderJob, Exception] = {}
+    if not jobs:
+        return errors
+    if not any(format in RASTER_FORMATS for format in formats):
+        for job in jobs:
+            try:
+                profiler.records.extend(render_job(job, formats))
+            except Exception as e:  # noqa: BLE001
+                errors[job] = e
+                print(f"{job.code} error={e}")
+        return errors
+
+    workers = min(workers or RENDER_WORKERS, len(jobs))
+    with _executor(workers, vl_version) as executor:
+        futures = {
+            executor.submit(render_job, job, formats, scale_factor, vl_version): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                profiler.records.extend(future.result())
+            except Exception as e:  # noqa: BLE001
+                errors[job] = e
+                print(f"{job.code} error={e}")
+    return errors
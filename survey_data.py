@@ -0,0 +1,135 @@
+from pathlib import Path
+
+import polars as pl
+
+from build_cache import BuildCache
+from survey_plan import MULTIPLE_CHOICE_VALUES, NOT_ANSWERED, SurveyPlan
+
+# export columns that are not questions, kept with their full header name
+RESPONSE_ID_COLUMN = "id. Response ID"
+SUBMITDATE_COLUMN = "submitdate. Date submitted"
+STARTDATE_COLUMN = "startdate. Date started"
+LAST_ACTION_COLUMN = "datestamp. Date last action"
+
+
+def responses_cache_path(csv_path: Path | str) -> Path:
+    return Path(csv_path).with_suffix(".arrow")
+
+
+def cache_key_path(cache_path: Path | str) -> Path:
+    # the key a cache was built with, next to it
+    return Path(f"{cache_path}.key")
+
+
+def answer_dtypes(plan: SurveyPlan) -> dict[str, pl.Enum]:
+    # the allowed values of every answer column, text answers excepted
+    dtypes = {}
+    for question in plan.questions.values():
+        match question.type:
+            case "single" | "ranking":
+                dtype = pl.Enum(question.choices)
+            case "multiple":
+                dtype = pl.Enum(MULTIPLE_CHOICE_VALUES)
+            case _:
+                continue
+        for column_id in question.column_ids:
+            dtypes[column_id] = dtype
+    return dtypes
+
+
+def responses_key(plan: SurveyPlan, csv_path: Path | str) -> str:
+    # the cache depends on the export, and on the plan through the column names
+    # and the choices of the answer columns
+    return BuildCache.key(
+        Path(csv_path).stat().st_mtime_ns,
+        dict(plan.column_ids),
+        {
+            column_id: dtype.categories.to_list()
+            for column_id, dtype in answer_dtypes(plan).items()
+        },
+    )
+
+
+def is_fresh_cache(cache_path: Path | str, key: str) -> bool:
+    key_path = cache_key_path(cache_path)
+    if not Path(cache_path).exists() or not key_path.exists():
+        return False
+    return key_path.read_text() == key
+
+
+def find_invalid_answers(
+    plan: SurveyPlan,
+    df: pl.LazyFrame,
+) -> dict[str, list[str]]:
+    # values outside of the allowed ones, by question, in a single pass
+    dtypes = answer_dtypes(plan)
+    invalid = (
+        df.select(
+            pl.col(column_id)
+            .filter(~pl.col(column_id).is_in(dtype.categories.to_list()))
+            .unique()
+            .implode()
+            for column_id, dtype in dtypes.items()
+        )
+        .collect()
+        .row(0, named=True)
+    )
+    invalid_by_question: dict[str, list[str]] = {}
+    for column_id, values in invalid.items():
+        if values:
+            invalid_by_question.setdefault(column_id[:3], []).extend(values)
+    return {
+        question_id: sorted(set(values))
+        for question_id, values in invalid_by_question.items()
+    }
+
+
+def build_responses_cache(
+    plan: SurveyPlan,
+    csv_path: Path | str,
+    cache_path: Path | str,
+):
+    # short `qNN[...]` column names, empty answers replaced by NOT_ANSWERED, and
+    # answer columns encoded as enums of their choices, written uncompressed so
+    # that it can be memory-mapped
+    df = (
+        pl.scan_csv(csv_path)
+        .rename(dict(plan.column_ids))
+        .with_columns(
+            pl.when(pl.col(pl.String).str.len_chars() == 0)
+            .then(pl.lit(NOT_ANSWERED))
+            .otherwise(pl.col(pl.String))
+            .name.keep()
+        )
+    )
+
+    invalid = find_invalid_answers(plan, df)
+    if invalid:
+        raise ValueError(
+            "Answers not in choices: "
+            + "; ".join(
+                f"{question_id}: {', '.join(map(repr, values))}"
+                for question_id, values in invalid.items()
+            )
+        )
+
+    tmp_path = Path(cache_path).with_suffix(".tmp")
+    df.cast(answer_dtypes(plan)).sink_ipc(tmp_path, compression=None)
+    tmp_path.replace(cache_path)
+    cache_key_path(cache_path).write_text(responses_key(plan, csv_path))
+
+
+def load_responses(
+    plan: SurveyPlan,
+    csv_path: Path | str = "data/results-survey2024.csv",
+) -> pl.LazyFrame:
+    """Scan the survey export from its Arrow IPC cache, (re)building it if needed.
+
+    The cache sits next to the CSV, with the `responses_key` it was built with in
+    `<export>.arrow.key`, and is rebuilt whenever the CSV or the plan changed:
+    its enums hold the choices of the plan it was built from.
+    """
+    cache_path = responses_cache_path(csv_path)
+    if not is_fresh_cache(cache_path, responses_key(plan, csv_path)):
+        build_responses_cache(plan, csv_path, cache_path)
+    return pl.scan_ipc(cache_path, memory_map=True)
@@ -0,0 +1,154 @@
+import json
+import re
+import typing
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Literal
+
+import polars as pl
+
+NOT_ANSWERED = "Not answered"
+OTHER = "Other"
+# values of the `qNN[SQxxx]` columns of multiple questions
+SELECTED = "Yes"
+MULTIPLE_CHOICE_VALUES = (SELECTED, "No", NOT_ANSWERED)
+
+
+if typing.TYPE_CHECKING:
+    QuestionTypes = (
+        Literal["single"] | Literal["multiple"] | Literal["ranking"] | Literal["text"]
+    )
+
+
+def get_actual_choices(
+    choices: list[str],
+    allow_other: bool,
+) -> list[str]:
+    return [*choices, NOT_ANSWERED, *([OTHER] if allow_other else [])]
+
+
+def extract_column_id(full_column_name: str) -> str | None:
+    m = re.match(r"^(q[0-9]{2}(\[.*\])?)\..+", full_column_name)
+    if m is None:
+        return None
+    return m.group(1)
+
+
+assert extract_column_id("q01. Where do you live?") == "q01"
+assert (
+    extract_column_id(
+        "q12[SQ001]. Which user types do you identify with? Select all that apply   \tType A: You love the idea behind Nix or NixOS.Maybe you spread the word among friends and coworkers.Maybe you are interested in or enthusiastic about any of the following: \t \t\tFree and open source software \t\tLinux \t\tHome automation \t\tOnline communities \t\tDistro-hopping \t \t \tType B. You’re here because you’re curious about Nix and how it works.Maybe you enjoy or want to learn functional programming, or you just want to learn new things.Maybe you identify yourself as: \t \t\tNix-curious developer \t\tStudent of a technical field \t\tEducator \t\tAcademic researcher \t \t \tType C: You use Nix or NixOS to get things done or boost your team’s productivity, you learn it to grow your career opportunities, or you have to use it on the job because someone said so.Maybe you identify yourself as: \t \t\tSystem administrator \t\tEmployee developer \t\tDevOps engineer \t\tNatural scientist \t\tOpen source software author \t\tEarly-career professional \t \t \tType D: You work or want to work on the Nix ecosystem rather than just with it.You are at least one of the following: \t \t\tAspiring contributor \t\tNovice contributor \t\tDrive-by contributor \t\tPackage maintainer \t\tCode owner \t\tCommunity team member \t\tSponsor \t \t \tType E: You make the strategic decisions for your team or company: which technologies to adopt, which skills to train your employees in, which projects to support or invest in, which services or products to offer.Maybe you’re a: \t \t\tEntrepreneur \t\tTeam lead \t\tSoftware architect \t\tCTO \t\tSales executive \t\tPublic service administrator \t \t   [A. I love the idea behind Nix]"
+    )
+    == "q12[SQ001]"
+)
+
+
+@dataclass(frozen=True)
+class QuestionPlan:
+    id: str
+    type: "QuestionTypes"
+    prompt: str
+    # read-only view of the question entry of survey.json
+    question: Mapping[str, Any]
+    # designed choices, plus NOT_ANSWERED and OTHER when allowed
+    choices: tuple[str, ...]
+    allow_other: bool
+    keep_choice_order: bool
+    # full CSV header names of the answer columns, and their short `qNN[...]` ids:
+    # the `qNN.` column for single and text questions,
+    # the `qNN[...]` columns for multiple and ranking questions
+    columns: tuple[str, ...]
+    column_ids: tuple[str, ...]
+    # short column id -> choice text, for `qNN[SQxxx]` columns
+    choice_by_column: Mapping[str, str]
+
+
+@dataclass(frozen=True)
+class SurveyPlan:
+    survey: Mapping[str, Any]
+    header: tuple[str, ...]
+    questions: Mapping[str, QuestionPlan]
+    # full CSV header name -> short `qNN[...]` id
+    column_ids: Mapping[str, str]
+
+    def question(self, column_name: str) -> QuestionPlan | None:
+        return self.questions.get(column_name[:3])
+
+    def choice_text(self, column_name: str) -> str | None:
+        q = self.question(column_name)
+        if q is None:
+            return None
+        return q.choice_by_column.get(column_name)
+
+
+def build_survey_plan(survey: dict, header: list[str]) -> SurveyPlan:
+    column_ids = {
+        full_column_name: column_id
+        for full_column_name in header
+        if (column_id := extract_column_id(full_column_name)) is not None
+    }
+
+    columns_by_question: dict[str, list[tuple[str, str]]] = {}
+    for full_column_name, column_id in column_ids.items():
+        columns_by_question.setdefault(column_id[:3], []).append(
+            (full_column_name, column_id)
+        )
+
+    questions = {}
+    for question in survey["questions"]:
+        question_id = question["id"]
+        question_type: "QuestionTypes" = question["type"]
+        allow_other = question.get("allow_other", False)
+        designed_choices = question.get("choices", [])
+
+        match question_type:
+            case "single" | "text":
+                columns = [
+                    (full, short)
+                    for full, short in columns_by_question.get(question_id, [])
+                    if short == question_id
+                ]
+            case _:
+                columns = [
+                    (full, short)
+                    for full, short in columns_by_question.get(question_id, [])
+                    if short != question_id
+                ]
+
+        choice_by_column = {}
+        for _, column_id in columns:
+            m = re.match(r"q[0-9]{2}\[SQ([0-9]{3})\]", column_id)
+            if m is not None and int(m.group(1)) <= len(designed_choices):
+                choice_by_column[column_id] = designed_choices[int(m.group(1)) - 1]
+
+        questions[question_id] = QuestionPlan(
+            id=question_id,
+            type=question_type,
+            prompt=question["prompt"],
+            question=MappingProxyType(question),
+            choices=tuple(get_actual_choices(designed_choices, allow_other)),
+            allow_other=allow_other,
+            keep_choice_order=question.get("keep_choice_order", False),
+            columns=tuple(full for full, _ in columns),
+            column_ids=tuple(short for _, short in columns),
+            choice_by_column=MappingProxyType(choice_by_column),
+        )
+
+    return SurveyPlan(
+        survey=MappingProxyType(survey),
+        header=tuple(header),
+        questions=MappingProxyType(questions),
+        column_ids=MappingProxyType(column_ids),
+    )
+
+
+def load_survey_plan(
+    survey_path: Path | str = "data/survey.json",
+    csv_path: Path | str = "data/results-survey2024.csv",
+) -> SurveyPlan:
+    with open(survey_path) as f:
+        survey = json.load(f)
+    header = pl.read_csv(csv_path, n_rows=0).columns
+    return build_survey_plan(survey, header)
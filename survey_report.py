@@ -0,0 +1,141 @@
+import argparse
+
+from render import RENDER_PRESETS, RENDER_WORKERS
+
+# the report scripts, polars, altair and vl-convert are only imported by `main`, so
+# that `--help` stays cheap
+REPORTS = ("basic", "advanced")
+
+
+def main(argv: list[str] | None = None):
+    from confidence import INTERVAL_METHODS
+    from output_store import OUTPUT_MODES
+
+    parser = argparse.ArgumentParser(
+        description="Write the answers and charts of the survey report to ./output."
+    )
+    parser.add_argument("report", choices=REPORTS)
+    parser.add_argument(
+        "--only",
+        type=lambda s: tuple(s.split(",")),
+        default=None,
+        help="comma separated question ids or chart codes, e.g. q08,q18",
+    )
+    parser.add_argument(
+        "--render",
+        choices=RENDER_PRESETS,
+        default="publish",
+        help="PNG at scale 3, SVG and JSON specs to publish, SVG and JSON specs "
+        "for a draft, or the JSON specs only",
+    )
+    parser.add_argument(
+        "--no-png",
+        action="store_true",
+        help="do not render PNG files, the slowest format",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=RENDER_WORKERS,
+        help="number of chart rendering processes, 0 for one per core or the "
+        "RENDER_WORKERS environment variable",
+    )
+    parser.add_argument(
+        "--output-mode",
+        choices=OUTPUT_MODES,
+        default="files",
+        help="one answers file per chart, or all of them in a single NDJSON store",
+    )
+    parser.add_argument(
+        "--intervals",
+        choices=INTERVAL_METHODS,
+        default=None,
+        help="add confidence intervals to the percentages, drawn as error bars",
+    )
+    parser.add_argument(
+        "--segment",
+        default=None,
+        help="single question id to write the basic report for each answer of, "
+        "under output/<segment>/<value>/",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="keep the answer counts between runs, and only count the responses "
+        "submitted since the previous one",
+    )
+    parser.add_argument(
+        "--editions",
+        default=None,
+        help="JSON list of survey editions to load together, with an `edition` "
+        "column to compare them by (see editions.py)",
+    )
+    parser.add_argument(
+        "--weights",
+        default=None,
+        help="JSON population shares of the choices of q01, q02 and q08 to weight "
+        "the respondents to (see weighting.py)",
+    )
+    parser.add_argument(
+        "--text-answers",
+        default=None,
+        help="JSON of text answers analyzed by hand, by question, used for the "
+        "questions it covers (default: data/results-survey2024-text_answers.json)",
+    )
+    parser.add_argument(
+        "--no-text-answers",
+        action="store_true",
+        help="count the answers of all text questions from the export",
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 0:
+        parser.error("--workers must be 0 or more")
+    if args.text_answers is not None and args.no_text_answers:
+        parser.error("--text-answers and --no-text-answers are exclusive")
+    if args.report != "basic":
+        if args.text_answers is not None or args.no_text_answers:
+            parser.error("text answers are only part of the basic report")
+        if args.segment is not None:
+            parser.error("--segment is only supported by the basic report")
+        if args.incremental:
+            parser.error("--incremental is only supported by the basic report")
+    if args.segment is not None and args.incremental:
+        parser.error("--incremental does not support --segment")
+    if args.editions is not None and args.incremental:
+        parser.error("--incremental does not support --editions")
+    if args.weights is not None and args.incremental:
+        parser.error("--incremental does not support --weights")
+    if args.segment == "edition" and args.editions is None:
+        parser.error("--segment edition needs --editions")
+
+    preset = RENDER_PRESETS[args.render]
+    formats = tuple(f for f in preset.formats if not (args.no_png and f == "png"))
+    match args.report:
+        case "basic":
+            from basic_charts import run
+        case "advanced":
+            from advanced_charts import run
+    basic_options = {}
+    if args.segment is not None:
+        basic_options["segment"] = args.segment
+    if args.incremental:
+        basic_options["incremental"] = True
+    if args.text_answers is not None:
+        basic_options["text_answers_path"] = args.text_answers
+    if args.no_text_answers:
+        basic_options["text_answers_path"] = None
+    run(
+        only=args.only,
+        formats=formats,
+        scale_factor=preset.scale_factor,
+        workers=args.workers,
+        output_mode=args.output_mode,
+        intervals=args.intervals,
+        editions_path=args.editions,
+        weights_path=args.weights,
+        **basic_options,
+    )
+
+
+if __name__ == "__main__":
+    main()
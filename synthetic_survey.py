@@ -0,0 +1,141 @@
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from survey_plan import OTHER, SELECTED
+
+# share of respondents leaving a question unanswered, and of partial submissions
+SKIP_RATE = 0.1
+UNSUBMITTED_RATE = 0.2
+TEXT_ANSWERS = {
+    "q16": ["2.18.1", "2.18", "2.24.0", "2.3.1", "nix (Nix) 2.20.5", "latest"],
+    "*": [
+        "Barrier to entry is too high",
+        "Confusing documentation",
+        "Error messages are hard to understand",
+        'Flakes, "experimental" for too long',
+        "n/a",
+    ],
+}
+
+
+def _pick(
+    rng: np.random.Generator,
+    values: list[str],
+    n: int,
+    skip_rate: float = SKIP_RATE,
+) -> pl.Series:
+    # random answers among `values` with uneven frequencies, or "" when skipped
+    weights = rng.dirichlet(np.ones(len(values)))
+    codes = rng.choice(len(values), size=n, p=weights)
+    codes[rng.random(n) < skip_rate] = len(values)
+    return pl.Series([*values, ""]).gather(codes)
+
+
+def generate_responses(
+    survey: dict,
+    n: int,
+    seed: int = 0,
+    ranks: int = 5,
+) -> pl.DataFrame:
+    """Random responses to `survey` with the columns of a LimeSurvey CSV export.
+
+    Like the export, answers are strings, unanswered cells are empty, multiple
+    questions have one `qNN[SQxxx]` Yes/No column per choice, ranking questions
+    one `qNN[i]` column per rank, and questions allowing other answers an extra
+    `qNN[other]` free text column.
+    """
+    rng = np.random.default_rng(seed)
+
+    submitted = pl.Series(rng.random(n) >= UNSUBMITTED_RATE)
+    # within the two months following 2024-05-01, in seconds since the epoch
+    started_at = 1_714_521_600 + rng.integers(0, 60 * 24 * 3600, size=n)
+    last_action_at = started_at + rng.integers(60, 3600, size=n)
+    started = pl.Series(started_at * 1000).cast(pl.Datetime("ms"))
+    last_action = pl.Series(last_action_at * 1000).cast(pl.Datetime("ms"))
+    date_format = "%Y-%m-%d %H:%M:%S"
+    columns: dict[str, pl.Series] = {
+        "id. Response ID": pl.Series(np.arange(1, n + 1)),
+        "submitdate. Date submitted": last_action.dt.strftime(date_format).set(
+            ~submitted, ""
+        ),
+        "lastpage. Last page": pl.Series(
+            np.where(submitted, 5, rng.integers(0, 5, size=n))
+        ),
+        "startlanguage. Start language": pl.repeat("en", n, eager=True),
+        "seed. Seed": pl.Series(rng.integers(0, 2**31, size=n)),
+        "startdate. Date started": started.dt.strftime(date_format),
+        "datestamp. Date last action": last_action.dt.strftime(date_format),
+    }
+
+    for question in survey["questions"]:
+        question_id = question["id"]
+        # header prompts are on a single line
+        prompt = " ".join(question["prompt"].split())
+        choices = question.get("choices", [])
+        skipped = rng.random(n) < SKIP_RATE
+
+        match question["type"]:
+            case "single":
+                allow_other = question.get("allow_other", False)
+                answers = _pick(rng, [*choices, *([OTHER] if allow_other else [])], n)
+                columns[f"{question_id}. {prompt}"] = answers
+                if allow_other:
+                    other = _pick(rng, TEXT_ANSWERS["*"], n, skip_rate=0)
+                    columns[f"{question_id}[other]. {prompt} [{OTHER}]"] = other.set(
+                        answers != OTHER, ""
+                    )
+            case "multiple":
+                rates = rng.beta(1, 3, size=len(choices))
+                for i, (choice, rate) in enumerate(zip(choices, rates)):
+                    selected = pl.Series(rng.random(n) < rate)
+                    column = pl.Series(["No", SELECTED]).gather(selected.cast(pl.UInt8))
+                    columns[f"{question_id}[SQ{i + 1:03}]. {prompt} [{choice}]"] = (
+                        column.set(pl.Series(skipped), "")
+                    )
+            case "ranking":
+                # Gumbel-top-k: a weighted random order of the choices per respondent
+                weights = np.log(rng.dirichlet(np.ones(len(choices))))
+                scores = weights + rng.gumbel(size=(n, len(choices)))
+                order = np.argsort(-scores, axis=1)
+                n_ranked = np.where(skipped, 0, rng.integers(1, ranks + 1, size=n))
+                options = pl.Series([*choices, ""])
+                for rank in range(min(ranks, len(choices))):
+                    codes = np.where(rank < n_ranked, order[:, rank], len(choices))
+                    columns[
+                        f"{question_id}[{rank + 1}]. {prompt} [Rank {rank + 1}]"
+                    ] = options.gather(codes)
+            case "text":
+                values = TEXT_ANSWERS.get(question_id, TEXT_ANSWERS["*"])
+                columns[f"{question_id}. {prompt}"] = _pick(rng, values, n, 0.6)
+
+    return pl.DataFrame(columns)
+
+
+def write_responses(
+    survey: dict,
+    n: int,
+    csv_path: Path | str,
+    seed: int = 0,
+):
+    # quoted like the LimeSurvey export, so that empty cells read as ""
+    generate_responses(survey, n, seed=seed).write_csv(csv_path, quote_style="always")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic LimeSurvey export of the survey."
+    )
+    parser.add_argument("respondents", type=int)
+    parser.add_argument("csv_path", type=Path)
+    parser.add_argument("--survey", type=Path, default=Path("data/survey.json"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.survey) as f:
+        survey = json.load(f)
+    args.csv_path.parent.mkdir(parents=True, exist_ok=True)
+    write_responses(survey, args.respondents, args.csv_path, seed=args.seed)
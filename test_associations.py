@@ -0,0 +1,49 @@
+from statistics import NormalDist
+
+import numpy as np
+import polars as pl
+import pytest
+
+from associations import _chi2_sf, _normal_sf, compute_associations
+from survey_plan import NOT_ANSWERED
+
+
+def test_normal_sf_matches_statistics():
+    z = np.linspace(-8, 8, 161)
+    expected = [1 - NormalDist().cdf(value) for value in z[z < 0]] + [
+        NormalDist().cdf(-value) for value in z[z >= 0]
+    ]
+    assert _normal_sf(z) == pytest.approx(expected, rel=2e-7)
+
+
+def test_chi2_reference_values():
+    # 5% critical values of the chi-square distribution
+    p_values = _chi2_sf(np.array([3.841, 5.991, 18.307]), np.array([1, 2, 10]))
+    assert p_values == pytest.approx([0.05, 0.05, 0.05], abs=1e-3)
+
+
+def test_chi2_matches_brute_force(survey):
+    plan, df = survey
+    associations = compute_associations(plan.questions.values(), df.lazy())
+    row = associations.filter(
+        pl.col("variable_a") == "q08", pl.col("variable_b") == "q09"
+    ).row(0, named=True)
+
+    answered = df.filter(pl.col("q08") != NOT_ANSWERED, pl.col("q09") != NOT_ANSWERED)
+    table = (
+        answered.pivot(on="q09", index="q08", values="q09", aggregate_function="len")
+        .fill_null(0)
+        .drop("q08")
+        .to_numpy()
+    )
+    n = table.sum()
+    expected = table.sum(axis=1)[:, None] * table.sum(axis=0)[None, :] / n
+    chi2 = ((table - expected) ** 2 / expected).sum()
+    dof = (table.shape[0] - 1) * (table.shape[1] - 1)
+
+    assert row["respondents"] == n
+    assert row["dof"] == dof
+    assert row["chi2"] == pytest.approx(chi2)
+    assert row["cramers_v"] == pytest.approx(
+        np.sqrt(chi2 / (n * (min(table.shape) - 1)))
+    )
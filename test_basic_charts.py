@@ -0,0 +1,21 @@
+import json
+
+from basic_charts import load_data
+from conftest import SURVEY_PATH
+
+
+def test_hand_made_text_answers_are_kept(responses, tmp_path):
+    csv_path = tmp_path / "results.csv"
+    responses.write_csv(csv_path, quote_style="always")
+    text_answers_path = tmp_path / "text_answers.json"
+    text_answers_path.write_text(json.dumps({"q21": {"Some theme": 12}}))
+
+    _, _, text_answers = load_data(SURVEY_PATH, csv_path, text_answers_path)
+    # the questions of the file keep their themes, the others are counted
+    assert text_answers["q21"] == [{"choice": "Some theme", "count": 12}]
+    assert {"q16", "q22", "q27"} <= text_answers.keys()
+    assert text_answers["q16"][0]["count"] > 0
+
+    _, _, counted = load_data(SURVEY_PATH, csv_path, text_answers_path=None)
+    assert counted["q21"] != text_answers["q21"]
+    assert counted["q16"] == text_answers["q16"]
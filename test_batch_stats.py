@@ -0,0 +1,77 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from batch_stats import compute_batched_stats
+from survey_data import RESPONSE_ID_COLUMN
+from survey_plan import NOT_ANSWERED, QuestionPlan
+
+
+def baseline_stats(question: QuestionPlan, df: pl.DataFrame) -> pl.DataFrame:
+    # the single and multiple branches of `compute_stats` before batching, over
+    # the CSV headers and empty strings of the export
+    match question.type:
+        case "single":
+            s = df[question.columns[0]].alias("choice")
+            s = s.set(s.str.len_chars() == 0, NOT_ANSWERED)
+            answers = s.value_counts()
+            return answers.with_columns(
+                (pl.col("count") / pl.sum("count")).alias("percentage")
+            )
+        case "multiple":
+            answers = (
+                df[list(question.columns)]
+                .unpivot()
+                .pivot(
+                    on="value",
+                    values="value",
+                    index="variable",
+                    aggregate_function="len",
+                )
+                .with_columns(pl.col("variable").str.extract(r".*\[(.+)\]"))
+                .rename({"variable": "choice"})
+                .unpivot(index=["choice"])
+                .rename({"value": "count"})
+                .with_columns(pl.col("count").fill_null(0))
+                .with_columns(
+                    pl.col("variable")
+                    .replace("Yes", "Selected")
+                    .replace("No", "Not selected")
+                    # the cleaned frame reads empty answers as "Not answered"
+                    .replace("", NOT_ANSWERED)
+                )
+            )
+            answers = answers.join(
+                answers.group_by("choice").agg(pl.sum("count").alias("total")),
+                on=["choice"],
+            )
+            answers = answers.join(
+                answers.filter(pl.col("variable") == "Selected").select(
+                    "choice", pl.col("count").alias("by_choice_is_selected_count")
+                ),
+                on=["choice"],
+            )
+            return answers.with_columns(percentage=pl.col("count") / pl.col("total"))
+
+
+@pytest.mark.parametrize("question_type", ["single", "multiple"])
+def test_batched_stats_match_baseline(survey, responses, question_type):
+    plan, df = survey
+    # the same responses as the cleaned frame, as exported
+    kept = responses.filter(
+        pl.col(RESPONSE_ID_COLUMN)
+        .cast(pl.String)
+        .is_in(df[RESPONSE_ID_COLUMN].cast(pl.String))
+    )
+    questions = [q for q in plan.questions.values() if q.type == question_type]
+    assert questions
+
+    batched = compute_batched_stats(questions, df.lazy())
+    for question in questions:
+        expected = baseline_stats(question, kept)
+        assert_frame_equal(
+            batched[question.id].select(expected.columns),
+            expected,
+            check_row_order=False,
+            check_dtypes=False,
+        )
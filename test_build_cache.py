@@ -0,0 +1,40 @@
+from build_cache import BuildCache
+from render import RENDER_FORMATS, RENDER_PRESETS, RenderJob, render_outputs
+
+
+def _render(job: RenderJob, formats: tuple[str, ...]):
+    # stands for render_charts, which is tested in test_render.py
+    for path in render_outputs(job, formats).values():
+        path.write_text(job.code)
+
+
+def test_preset_switch_removes_stale_charts(tmp_path):
+    job = RenderJob(code="q01", spec={"mark": "bar"}, output_path=tmp_path)
+    cache = BuildCache(tmp_path, name="test")
+    _render(job, RENDER_FORMATS)
+    cache.store_charts([job], {}, RENDER_FORMATS)
+    assert cache.is_fresh("chart", job.code, cache.chart_key(job, RENDER_FORMATS))
+
+    draft = RENDER_PRESETS["draft"]
+    assert not cache.is_fresh(
+        "chart", job.code, cache.chart_key(job, draft.formats, draft.scale_factor)
+    )
+    _render(job, draft.formats)
+    cache.store_charts([job], {}, draft.formats, draft.scale_factor)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "chart_json_q01.json",
+        "chart_plot_q01.svg",
+    ]
+
+
+def test_shared_files_are_kept(tmp_path):
+    # files still listed by another entry, like a dataset store, stay
+    shared, own = tmp_path / "datasets.ndjson", tmp_path / "answers_q01.json"
+    for path in (shared, own):
+        path.write_text("")
+    cache = BuildCache(tmp_path, name="test")
+    cache.store("answers", "q01", "a", [shared, own])
+    cache.store("answers", "q02", "a", [shared])
+    cache.store("answers", "q01", "b", [])
+    assert shared.exists()
+    assert not own.exists()
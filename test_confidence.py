@@ -0,0 +1,42 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from confidence import add_intervals, bootstrap_intervals, wilson_intervals
+
+
+def test_wilson_reference_values():
+    lower, upper = wilson_intervals(np.array([5, 0]), np.array([10, 10]))
+    assert lower == pytest.approx([0.2366, 0.0], abs=1e-4)
+    assert upper == pytest.approx([0.7634, 0.2775], abs=1e-4)
+
+
+def test_bootstrap_close_to_wilson():
+    count, total = np.array([30, 120, 500]), np.array([100, 400, 1000])
+    wilson = wilson_intervals(count, total)
+    bootstrap = bootstrap_intervals(count, total)
+    np.testing.assert_allclose(bootstrap, wilson, atol=0.02)
+    # the same seed gives the same resamples
+    np.testing.assert_array_equal(bootstrap, bootstrap_intervals(count, total))
+
+
+def test_intervals_of_each_table():
+    tables = {
+        "a": pl.DataFrame({"count": [5, 5], "total": [10, 10]}),
+        "b": pl.DataFrame({"count": [120], "total": [400]}),
+    }
+    intervals = add_intervals(tables)
+    assert intervals.keys() == tables.keys()
+    for code, table in tables.items():
+        lower, upper = wilson_intervals(
+            table["count"].to_numpy(), table["total"].to_numpy()
+        )
+        assert intervals[code]["percentage_lower"].to_list() == pytest.approx(lower)
+        assert intervals[code]["percentage_upper"].to_list() == pytest.approx(upper)
+
+    # a design effect of 2 halves the number of respondents behind the counts
+    widened = add_intervals(tables, design_effects={"b": 2.0})
+    lower, upper = wilson_intervals(np.array([60]), np.array([200]))
+    assert widened["b"]["percentage_lower"][0] == pytest.approx(lower[0])
+    assert widened["b"]["percentage_upper"][0] == pytest.approx(upper[0])
+    assert widened["a"].equals(intervals["a"])
@@ -0,0 +1,50 @@
+from collections import Counter
+
+import pytest
+
+from crosstab import crosstab
+from survey_plan import SELECTED, SurveyPlan
+
+
+def _selected(plan: SurveyPlan, question_id: str, row: dict) -> list[str]:
+    # the answer of a single question, or the selected choices of a multiple one
+    question = plan.questions[question_id]
+    if question.type == "single":
+        return [row[question_id]]
+    return [
+        question.choice_by_column[column_id]
+        for column_id in question.column_ids
+        if row[column_id] == SELECTED
+    ]
+
+
+@pytest.mark.parametrize(
+    ("question_a", "question_b"),
+    [("q08", "q09"), ("q08", "q14"), ("q14", "q08"), ("q06", "q13")],
+)
+def test_counts_match_brute_force(survey, question_a, question_b):
+    plan, df = survey
+    table = crosstab(plan, df.lazy(), question_a, question_b)
+
+    expected = Counter(
+        (a, b)
+        for row in df.iter_rows(named=True)
+        for a in _selected(plan, question_a, row)
+        for b in _selected(plan, question_b, row)
+    )
+    assert {(a, b): count for a, b, count in table.iter_rows() if count > 0} == expected
+
+
+def test_counts_by_group(survey):
+    plan, df = survey
+    table = crosstab(plan, df.lazy(), "q08", "q13", by="q01")
+
+    expected = Counter(
+        (row["q01"], a, b)
+        for row in df.iter_rows(named=True)
+        for a in _selected(plan, "q08", row)
+        for b in _selected(plan, "q13", row)
+    )
+    assert {
+        (group, a, b): count for group, a, b, count in table.iter_rows() if count > 0
+    } == expected
@@ -0,0 +1,145 @@
+import json
+from datetime import datetime
+
+import polars as pl
+import pytest
+
+from conftest import SURVEY_PATH
+from data_quality import (
+    DATE_FORMAT,
+    SPEEDER_SECONDS,
+    load_clean_responses,
+    quality_flags,
+)
+from survey_data import (
+    LAST_ACTION_COLUMN,
+    RESPONSE_ID_COLUMN,
+    STARTDATE_COLUMN,
+    SUBMITDATE_COLUMN,
+    load_responses,
+)
+from survey_plan import NOT_ANSWERED, load_survey_plan
+
+LATER = "2024-12-31 00:00:00"
+
+
+@pytest.fixture(scope="module")
+def raw(responses, tmp_path_factory):
+    # the responses before the quality checks
+    csv_path = tmp_path_factory.mktemp("raw") / "results.csv"
+    responses.write_csv(csv_path, quote_style="always")
+    plan = load_survey_plan(SURVEY_PATH, csv_path)
+    return plan, load_responses(plan, csv_path).collect()
+
+
+def _flags(plan, df: pl.DataFrame) -> dict[int, set[str]]:
+    # the flags raised for each response id
+    flags = quality_flags(plan, df.lazy()).collect()
+    return {
+        row.pop(RESPONSE_ID_COLUMN): {flag for flag, value in row.items() if value}
+        for row in flags.iter_rows(named=True)
+    }
+
+
+def _add(df: pl.DataFrame, *rows: dict) -> pl.DataFrame:
+    # rows changed from existing ones, under new response ids
+    next_id = df[RESPONSE_ID_COLUMN].max() + 1
+    rows = [{**row, RESPONSE_ID_COLUMN: next_id + i} for i, row in enumerate(rows)]
+    return pl.concat([df, pl.DataFrame(rows, schema=df.schema)])
+
+
+def _clean_row(plan, df: pl.DataFrame) -> dict:
+    # a submitted response raising no flag
+    flags = _flags(plan, df)
+    return next(
+        row for row in df.iter_rows(named=True) if not flags[row[RESPONSE_ID_COLUMN]]
+    )
+
+
+def test_partial_and_speeder_flags(raw):
+    plan, df = raw
+    flags = _flags(plan, df)
+    for row in df.iter_rows(named=True):
+        partial = row[SUBMITDATE_COLUMN] == NOT_ANSWERED
+        duration = datetime.strptime(
+            row[LAST_ACTION_COLUMN], DATE_FORMAT
+        ) - datetime.strptime(row[STARTDATE_COLUMN], DATE_FORMAT)
+        speeder = not partial and duration.total_seconds() < SPEEDER_SECONDS
+        assert ("partial" in flags[row[RESPONSE_ID_COLUMN]]) == partial
+        assert ("speeder" in flags[row[RESPONSE_ID_COLUMN]]) == speeder
+        # a partial submission is only dropped as such
+        if partial:
+            assert flags[row[RESPONSE_ID_COLUMN]] == {"partial"}
+
+
+def test_straight_lining(raw):
+    plan, df = raw
+    row = _clean_row(plan, df)
+    singles = [q for q in plan.questions.values() if q.type == "single"]
+    first_choices = {q.id: q.choices[0] for q in singles}
+    # too few answered single questions to tell
+    unanswered = {q.id: NOT_ANSWERED for q in singles}
+    few_answers = {**unanswered, **dict(list(first_choices.items())[:4])}
+
+    df = _add(df, {**row, **first_choices}, {**row, **few_answers})
+    flags = _flags(plan, df)
+    assert flags[df[RESPONSE_ID_COLUMN][-2]] == {"straight_lining"}
+    assert flags[df[RESPONSE_ID_COLUMN][-1]] == set()
+
+
+def test_duplicates(raw):
+    plan, df = raw
+    row = _clean_row(plan, df)
+    df = _add(
+        df,
+        {**row, SUBMITDATE_COLUMN: LATER},
+        {**row, SUBMITDATE_COLUMN: LATER, "q21": "some other text"},
+    )
+    flags = _flags(plan, df)
+    # the first submission is kept
+    assert flags[row[RESPONSE_ID_COLUMN]] == set()
+    assert flags[df[RESPONSE_ID_COLUMN][-2]] == {"duplicate"}
+    assert flags[df[RESPONSE_ID_COLUMN][-1]] == {"near_duplicate"}
+
+
+def test_viewed_multiple_questions_are_not_answers(raw):
+    plan, df = raw
+    row = _clean_row(plan, df)
+    # only scrolled past the multiple questions, and answered the text ones
+    skipped = {
+        column_id: "No" if question.type == "multiple" else NOT_ANSWERED
+        for question in plan.questions.values()
+        if question.type != "text"
+        for column_id in question.column_ids
+    }
+    df = _add(
+        df,
+        {**row, **skipped, "q21": "first text"},
+        {**row, **skipped, SUBMITDATE_COLUMN: LATER, "q21": "second text"},
+    )
+    flags = _flags(plan, df)
+    assert flags[df[RESPONSE_ID_COLUMN][-2]] == set()
+    assert flags[df[RESPONSE_ID_COLUMN][-1]] == set()
+
+
+def test_clean_cache_follows_plan(responses, survey_json, tmp_path):
+    csv_path = tmp_path / "results.csv"
+    responses.write_csv(csv_path, quote_style="always")
+    survey_path = tmp_path / "survey.json"
+    survey_path.write_text(json.dumps(survey_json))
+    plan = load_survey_plan(survey_path, csv_path)
+    load_clean_responses(plan, csv_path).collect()
+
+    # a new choice in survey.json is in the enum of the rebuilt cleaned cache
+    survey = {
+        **survey_json,
+        "questions": [
+            {**q, "choices": [*q["choices"], "Wizard"]} if q["id"] == "q09" else q
+            for q in survey_json["questions"]
+        ],
+    }
+    survey_path.write_text(json.dumps(survey))
+    plan = load_survey_plan(survey_path, csv_path)
+    assert load_clean_responses(plan, csv_path).collect_schema()["q09"] == pl.Enum(
+        plan.questions["q09"].choices
+    )
@@ -0,0 +1,80 @@
+import json
+
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from conftest import SURVEY_PATH
+from data_quality import load_clean_responses
+from editions import EDITION_COLUMN, Edition, load_editions
+from survey_data import RESPONSE_ID_COLUMN
+from survey_plan import NOT_ANSWERED, load_survey_plan
+
+LINUX = "q06[SQ001]. Which operating systems do you currently use? [GNU/Linux]"
+MACOS = "q06[SQ002]. Which operating systems do you currently use? [macOS]"
+
+
+def _previous_edition(survey_json, responses, tmp_path) -> Edition:
+    # the same responses, to a survey without q20, where q01 said "N. America"
+    # and q06 listed macOS before GNU/Linux
+    survey = json.loads(json.dumps(survey_json))
+    survey["questions"] = [q for q in survey["questions"] if q["id"] != "q20"]
+    questions = {q["id"]: q for q in survey["questions"]}
+    questions["q01"]["choices"] = [
+        "N. America" if c == "North America" else c for c in questions["q01"]["choices"]
+    ]
+    choices = questions["q06"]["choices"]
+    choices[0], choices[1] = choices[1], choices[0]
+    survey_path = tmp_path / "survey2023.json"
+    with open(survey_path, "w") as f:
+        json.dump(obj=survey, fp=f)
+
+    csv_path = tmp_path / "results-survey2023.csv"
+    swapped = {
+        LINUX: pl.col(MACOS).alias(LINUX.replace("GNU/Linux", "macOS")),
+        MACOS: pl.col(LINUX).alias(MACOS.replace("macOS", "GNU/Linux")),
+    }
+    responses.select(
+        swapped.get(c, pl.col(c)) for c in responses.columns if not c.startswith("q20")
+    ).with_columns(pl.col("^q01.*$").replace("North America", "N. America")).write_csv(
+        csv_path, quote_style="always"
+    )
+    return Edition(
+        name="2023",
+        survey_path=survey_path,
+        csv_path=csv_path,
+        choices={"q01": {"N. America": "North America"}},
+    )
+
+
+def test_editions_are_mapped_to_the_reference(survey_json, responses, tmp_path):
+    csv_path = tmp_path / "results-survey2024.csv"
+    responses.write_csv(csv_path, quote_style="always")
+    editions = [
+        _previous_edition(survey_json, responses, tmp_path),
+        Edition(name="2024", survey_path=SURVEY_PATH, csv_path=csv_path),
+    ]
+    reference, df = load_editions(editions)
+    df = df.collect()
+
+    assert "q20" in reference.questions
+    frames = df.partition_by(EDITION_COLUMN, as_dict=True)
+    for edition in editions:
+        plan = load_survey_plan(edition.survey_path, edition.csv_path)
+        clean = load_clean_responses(plan, edition.csv_path).collect()
+        assert frames[(edition.name,)].height == clean.height
+    # the question 2023 did not ask is not answered by its respondents
+    previous, current = frames[("2023",)], frames[("2024",)]
+    assert previous.height > 0
+    assert (previous["q20"] == NOT_ANSWERED).all()
+    # renamed choices and reordered columns hold the same answers as in 2024
+    columns = ["q01", "q06[SQ001]", "q06[SQ002]"]
+    assert_frame_equal(
+        previous.join(current.select(RESPONSE_ID_COLUMN), on=RESPONSE_ID_COLUMN)
+        .select(RESPONSE_ID_COLUMN, *columns)
+        .cast(pl.String)
+        .sort(RESPONSE_ID_COLUMN),
+        current.join(previous.select(RESPONSE_ID_COLUMN), on=RESPONSE_ID_COLUMN)
+        .select(RESPONSE_ID_COLUMN, *columns)
+        .cast(pl.String)
+        .sort(RESPONSE_ID_COLUMN),
+    )
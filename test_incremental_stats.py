@@ -0,0 +1,48 @@
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from batch_stats import compute_batched_stats
+from conftest import export_responses
+from incremental_stats import CountState
+from survey_data import SUBMITDATE_COLUMN
+
+
+def test_counts_match_full_recompute(responses, tmp_path):
+    # a first export, then the same one with the responses submitted since
+    submitted = responses.filter(pl.col(SUBMITDATE_COLUMN) != "")
+    cutoff = submitted[SUBMITDATE_COLUMN].sort()[submitted.height // 2]
+    first = responses.filter(pl.col(SUBMITDATE_COLUMN) <= cutoff)
+    state = CountState(tmp_path / "output", name="test")
+
+    plan, df = export_responses(first, tmp_path / "first/results.csv")
+    state.update(plan.questions.values(), df)
+    plan, df = export_responses(responses, tmp_path / "all/results.csv")
+    counted = state.update(plan.questions.values(), df)
+
+    expected = compute_batched_stats(plan.questions.values(), df)
+    assert counted.keys() == expected.keys()
+    for question_id, answers in expected.items():
+        assert_frame_equal(
+            counted[question_id],
+            answers,
+            check_row_order=False,
+            check_dtypes=False,
+        )
+
+
+def test_replaced_export_is_counted_again(responses, tmp_path):
+    # an export with fewer submissions than counted starts the counts over
+    state = CountState(tmp_path / "output", name="test")
+    plan, df = export_responses(responses, tmp_path / "all/results.csv")
+    state.update(plan.questions.values(), df)
+    plan, df = export_responses(responses.head(500), tmp_path / "head/results.csv")
+    counted = state.update(plan.questions.values(), df)
+
+    expected = compute_batched_stats(plan.questions.values(), df)
+    for question_id, answers in expected.items():
+        assert_frame_equal(
+            counted[question_id],
+            answers,
+            check_row_order=False,
+            check_dtypes=False,
+        )
@@ -0,0 +1,58 @@
+import altair as alt
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from output_store import (
+    DatasetStore,
+    chart_job,
+    has_answers,
+    is_selected,
+    read_answers,
+    write_answers,
+)
+
+ANSWERS = pl.DataFrame({"choice": ["a", "b"], "count": [1, 2]})
+
+
+def test_answers_round_trip(tmp_path):
+    for store in (None, DatasetStore(tmp_path / "datasets.ndjson")):
+        path = write_answers(ANSWERS, "q01", tmp_path, store)
+        assert path.exists() == (store is None)
+        assert has_answers("q01", tmp_path, store)
+        assert not has_answers("q02", tmp_path, store)
+        assert_frame_equal(read_answers("q01", tmp_path, store), ANSWERS)
+
+
+def test_chart_spec_refers_to_stored_answers(tmp_path):
+    store = DatasetStore(tmp_path / "datasets.ndjson")
+    write_answers(ANSWERS, "q01", tmp_path, store)
+    chart = alt.Chart(ANSWERS).mark_bar().encode(x="choice", y="count")
+    job = chart_job("q01", chart, tmp_path, store)
+
+    # images are rendered from the inline data, the JSON spec names the answers
+    assert "datasets" in job.spec
+    assert "datasets" not in job.json_spec
+    assert job.json_spec["data"] == {"name": "q01"}
+
+
+def test_save_drops_unused_datasets(tmp_path):
+    path = tmp_path / "datasets.ndjson"
+    store = DatasetStore(path)
+    for code in ("q01", "q02"):
+        write_answers(ANSWERS, code, tmp_path, store)
+    store.save()
+
+    # a partial run keeps what it did not touch, a full run drops it
+    store = DatasetStore(path)
+    store.keep("q01")
+    store.save(partial=True)
+    assert DatasetStore(path).datasets.keys() == {"q01", "q02"}
+    store.save()
+    assert DatasetStore(path).datasets.keys() == {"q01"}
+
+
+def test_is_selected():
+    assert is_selected("q08_q09", None)
+    assert is_selected("q08_q09", {"q09"})
+    assert is_selected("cooc_q07", {"cooc_q07"})
+    assert not is_selected("q08_q09", {"q10"})
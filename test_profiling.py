@@ -0,0 +1,35 @@
+import json
+import sys
+
+import numpy as np
+import pytest
+
+from profiling import Profiler
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="sampled from /proc")
+def test_stages_below_an_earlier_peak_have_their_own_peak():
+    profiler = Profiler()
+    with profiler.stage("large"):
+        data = np.ones(400 * 2**20 // 8)
+    del data
+    with profiler.stage("small"):
+        data = np.ones(100 * 2**20 // 8)
+    del data
+    large, small = profiler.records
+    # the second stage stays below the high-water mark of the first one
+    assert large["rss_growth_mb"] > 300
+    assert 50 < small["rss_growth_mb"] < 300
+    assert small["peak_rss_mb"] < large["peak_rss_mb"]
+
+
+def test_runs_share_the_profile(tmp_path):
+    for run in ("basic_charts", "advanced_charts"):
+        profiler = Profiler()
+        with profiler.stage("load"):
+            pass
+        profiler.write(tmp_path / "profile.json", run=run)
+    with open(tmp_path / "profile.json") as f:
+        runs = json.load(f)
+    assert runs.keys() == {"basic_charts", "advanced_charts"}
+    assert runs["basic_charts"]["summary"][0]["stage"] == "load"
@@ -0,0 +1,51 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from query_server import QueryHandler
+
+
+class _Queries:
+    # answers `ok`, and fails like a bug anywhere else
+    def query(self, endpoint: str, params: tuple) -> dict:
+        match endpoint:
+            case "ok":
+                return {"params": [list(p) for p in params]}
+            case "missing":
+                raise LookupError("Unknown endpoint missing")
+            case "invalid":
+                raise ValueError("Missing parameters q")
+            case _:
+                raise RuntimeError("boom")
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(QueryHandler, "queries", _Queries(), raising=False)
+    monkeypatch.setattr(QueryHandler, "log_message", lambda *args: None)
+    with ThreadingHTTPServer(("127.0.0.1", 0), QueryHandler) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+        server.shutdown()
+
+
+def _get(url: str) -> tuple[int, dict]:
+    try:
+        with urlopen(url) as response:
+            return response.status, json.load(response)
+    except HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_errors_are_json(server):
+    assert _get(f"{server}/ok?q=q18") == (200, {"params": [["q", ["q18"]]]})
+    assert _get(f"{server}/missing")[0] == 404
+    assert _get(f"{server}/invalid")[0] == 400
+    status, body = _get(f"{server}/crash")
+    assert status == 500
+    assert "boom" in body["error"]
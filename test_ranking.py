@@ -0,0 +1,75 @@
+import re
+from collections import Counter
+
+import numpy as np
+
+from ranking import compute_rankings, rank_matrix
+from survey_plan import NOT_ANSWERED
+
+
+def _ranking_questions(plan):
+    return [q for q in plan.questions.values() if q.type == "ranking"]
+
+
+def test_rank_matrix_matches_brute_force(survey):
+    plan, df = survey
+    for question in _ranking_questions(plan):
+        choices = [c for c in question.choices if c != NOT_ANSWERED]
+        matrix = rank_matrix(question, df.lazy())
+
+        expected = np.zeros((df.height, len(choices)), dtype=np.int16)
+        for respondent, row in enumerate(df.iter_rows(named=True)):
+            for column_id in question.column_ids:
+                rank = int(re.search(r"\[(\d+)\]", column_id).group(1))
+                choice = row[column_id]
+                if choice == NOT_ANSWERED:
+                    continue
+                current = expected[respondent, choices.index(choice)]
+                # a choice ranked twice keeps its best rank
+                if current == 0 or rank < current:
+                    expected[respondent, choices.index(choice)] = rank
+        np.testing.assert_array_equal(matrix, expected)
+
+
+def test_borda_scores_match_brute_force(survey):
+    plan, df = survey
+    rankings = compute_rankings(plan.questions.values(), df.lazy())
+    assert rankings.keys() == {q.id for q in _ranking_questions(plan)}
+    for question in _ranking_questions(plan):
+        choices = [c for c in question.choices if c != NOT_ANSWERED]
+        n_ranks = len(question.column_ids)
+
+        expected = Counter()
+        for ranks in rank_matrix(question, df.lazy()):
+            for choice, rank in zip(choices, ranks):
+                if rank > 0:
+                    expected[choice] += n_ranks + 1 - rank
+        scores = rankings[question.id].scores
+        assert {
+            choice: borda
+            for choice, borda in scores.select("choice", "borda").iter_rows()
+            if borda > 0
+        } == expected
+
+
+def test_pairwise_matches_brute_force(survey):
+    plan, df = survey
+    rankings = compute_rankings(plan.questions.values(), df.lazy())
+    for question_id, ranking in rankings.items():
+        question = plan.questions[question_id]
+        choices = [c for c in question.choices if c != NOT_ANSWERED]
+        matrix = rank_matrix(question, df.lazy())
+        # unranked choices are below all ranked ones
+        ranks = np.where(matrix > 0, matrix, np.iinfo(np.int16).max)
+
+        expected = Counter()
+        for respondent_ranks in ranks:
+            for a, rank_a in enumerate(respondent_ranks):
+                for b, rank_b in enumerate(respondent_ranks):
+                    if rank_a < rank_b:
+                        expected[choices[a], choices[b]] += 1
+        assert {
+            (a, b): count
+            for a, b, count, _ in ranking.pairwise.iter_rows()
+            if count > 0
+        } == expected
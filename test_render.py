@@ -0,0 +1,27 @@
+from render import RenderJob, render_charts, render_outputs
+
+SPEC = {
+    "data": {"values": [{"choice": "a", "count": 1}, {"choice": "b", "count": 2}]},
+    "mark": "bar",
+    "encoding": {
+        "x": {"field": "choice", "type": "nominal"},
+        "y": {"field": "count", "type": "quantitative"},
+    },
+}
+
+
+def test_zero_workers_is_the_default(tmp_path):
+    jobs = [RenderJob(code=f"q0{i}", spec=SPEC, output_path=tmp_path) for i in (1, 2)]
+    errors = render_charts(jobs, workers=0, formats=("svg", "json"), scale_factor=1)
+    assert errors == {}
+    for job in jobs:
+        for path in render_outputs(job, ("svg", "json")).values():
+            assert path.stat().st_size > 0
+
+
+def test_failing_chart_does_not_stop_the_others(tmp_path):
+    good = RenderJob(code="good", spec=SPEC, output_path=tmp_path)
+    bad = RenderJob(code="bad", spec={"mark": "no such mark"}, output_path=tmp_path)
+    errors = render_charts([bad, good], workers=1, formats=("svg",))
+    assert errors.keys() == {bad}
+    assert render_outputs(good, ("svg",))["svg"].exists()
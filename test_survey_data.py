@@ -0,0 +1,70 @@
+import json
+import os
+
+import polars as pl
+import pytest
+
+from survey_data import load_responses
+from survey_plan import load_survey_plan
+
+
+@pytest.fixture
+def export(responses, survey_json, tmp_path):
+    csv_path = tmp_path / "results.csv"
+    responses.write_csv(csv_path, quote_style="always")
+    survey_path = tmp_path / "survey.json"
+    survey_path.write_text(json.dumps(survey_json))
+    return survey_path, csv_path
+
+
+def test_cache_follows_plan(export, survey_json):
+    survey_path, csv_path = export
+    plan = load_survey_plan(survey_path, csv_path)
+    assert load_responses(plan, csv_path).collect_schema()["q09"] == pl.Enum(
+        plan.questions["q09"].choices
+    )
+
+    # a new choice in survey.json is in the enum of the rebuilt cache
+    survey = {
+        **survey_json,
+        "questions": [
+            {**q, "choices": [*q["choices"], "Wizard"]} if q["id"] == "q09" else q
+            for q in survey_json["questions"]
+        ],
+    }
+    survey_path.write_text(json.dumps(survey))
+    plan = load_survey_plan(survey_path, csv_path)
+    assert "Wizard" in plan.questions["q09"].choices
+    assert load_responses(plan, csv_path).collect_schema()["q09"] == pl.Enum(
+        plan.questions["q09"].choices
+    )
+
+
+def test_renamed_choice_is_reported(export, survey_json):
+    survey_path, csv_path = export
+    load_responses(load_survey_plan(survey_path, csv_path), csv_path)
+
+    survey = {
+        **survey_json,
+        "questions": [
+            {**q, "choices": [f"{q['choices'][0]} (renamed)", *q["choices"][1:]]}
+            if q["id"] == "q09"
+            else q
+            for q in survey_json["questions"]
+        ],
+    }
+    survey_path.write_text(json.dumps(survey))
+    with pytest.raises(ValueError, match="Answers not in choices: q09"):
+        load_responses(load_survey_plan(survey_path, csv_path), csv_path)
+
+
+def test_cache_follows_export(export, responses):
+    survey_path, csv_path = export
+    plan = load_survey_plan(survey_path, csv_path)
+    assert load_responses(plan, csv_path).collect().height == responses.height
+
+    # a replaced export is converted again, even when it is not newer
+    stat = csv_path.stat()
+    responses.head(100).write_csv(csv_path, quote_style="always")
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+    assert load_responses(plan, csv_path).collect().height == 100
@@ -0,0 +1,55 @@
+import polars as pl
+
+from survey_plan import NOT_ANSWERED
+from text_normalization import count_text_answers
+
+
+def test_answers_are_normalized(survey):
+    plan, _ = survey
+    df = pl.LazyFrame(
+        {
+            "q16": [
+                "2.18.1",
+                "nix (Nix) 2.18.5",
+                "2.18",
+                "Latest",
+                "latest stable",
+                "n/a",
+                NOT_ANSWERED,
+                "2.24.0",
+            ],
+            "q21": [
+                "Confusing  documentation.",
+                "confusing documentation",
+                "Confusing documentation",
+                "NA",
+                "Flakes!",
+                "-",
+                NOT_ANSWERED,
+                NOT_ANSWERED,
+            ],
+        }
+    )
+    counts = count_text_answers([plan.questions["q16"], plan.questions["q21"]], df)
+    assert counts == {
+        "q16": [
+            {"choice": "2.18", "count": 3},
+            {"choice": "latest", "count": 2},
+            {"choice": "2.24", "count": 1},
+        ],
+        "q21": [
+            {"choice": "Confusing documentation", "count": 3},
+            {"choice": "Flakes", "count": 1},
+        ],
+    }
+
+
+def test_all_answers_are_counted(survey):
+    plan, df = survey
+    questions = [q for q in plan.questions.values() if q.type == "text"]
+    counts = count_text_answers(questions, df.lazy())
+    assert counts.keys() == {q.id for q in questions}
+    for question in questions:
+        answers = df[question.id]
+        dropped = answers.is_in([NOT_ANSWERED, "n/a"]).sum()
+        assert sum(r["count"] for r in counts[question.id]) == df.height - dropped
@@ -0,0 +1,66 @@
+import polars as pl
+import pytest
+
+from weighting import WEIGHT_COLUMN, add_weights, design_effects
+
+TARGETS = {
+    "q01": {"North America": 0.3, "Western Europe": 0.5, "Eastern Europe": 0.2},
+    "q02": {"18-24 years old": 0.2, "25-34 years old": 0.5, "35-44 years old": 0.3},
+    "q08": {"Less than 1 year": 0.6, "5 to 10 years": 0.4},
+}
+
+
+def _assert_margins(weighted: pl.DataFrame):
+    # the targeted choices share what the others leave, in proportion
+    respondents = weighted.height
+    for question_id, shares in TARGETS.items():
+        totals = dict(
+            weighted.group_by(pl.col(question_id).cast(pl.String))
+            .agg(pl.sum(WEIGHT_COLUMN))
+            .iter_rows()
+        )
+        left = respondents - sum(
+            total for choice, total in totals.items() if choice not in shares
+        )
+        for choice, share in shares.items():
+            assert totals[choice] == pytest.approx(
+                share / sum(shares.values()) * left, rel=1e-5
+            )
+
+
+def test_raked_margins_match_targets(survey):
+    plan, df = survey
+    weighted = add_weights(plan, df.lazy(), TARGETS).collect()
+    assert weighted.height == df.height
+    assert weighted[WEIGHT_COLUMN].sum() == pytest.approx(df.height)
+    _assert_margins(weighted)
+
+
+def test_raked_margins_by_group(survey):
+    plan, df = survey
+    halves = df.lazy().with_columns(half=pl.int_range(pl.len()) % 2)
+    weighted = add_weights(plan, halves, TARGETS, by="half").collect()
+    for _, group in weighted.group_by("half"):
+        assert group[WEIGHT_COLUMN].sum() == pytest.approx(group.height)
+        _assert_margins(group)
+
+
+def test_design_effects():
+    df = pl.LazyFrame({"group": ["a", "a", "b", "b"], WEIGHT_COLUMN: [1, 1, 1, 3]})
+    assert design_effects(df) == {None: pytest.approx(4 * 12 / 36)}
+    assert design_effects(df, by="group") == {
+        "a": pytest.approx(1),
+        "b": pytest.approx(2 * 10 / 16),
+    }
+
+
+def test_unknown_or_missing_choices(survey):
+    plan, df = survey
+    with pytest.raises(ValueError, match="Not choices of q01"):
+        add_weights(plan, df.lazy(), {"q01": {"Atlantis": 1.0}})
+    with pytest.raises(ValueError, match="No respondent to weight for q01"):
+        add_weights(
+            plan,
+            df.lazy().filter(pl.col("q01") != "North America"),
+            {"q01": {"North America": 0.5, "Western Europe": 0.5}},
+        )
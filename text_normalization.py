@@ -0,0 +1,107 @@
+from collections.abc import Iterable, Mapping
+
+import polars as pl
+
+from survey_plan import NOT_ANSWERED, QuestionPlan
+
+# questions answered with a Nix version, bucketed by major.minor: "2.18",
+# "2.18.5" and "nix (Nix) 2.18.1" are all "2.18"
+VERSION_QUESTIONS = ("q16",)
+# folded answer -> choice, by question id, "*" applying to all text questions.
+# Answers mapped to NOT_ANSWERED are dropped
+SYNONYMS: dict[str, dict[str, str]] = {
+    "*": {
+        "n/a": NOT_ANSWERED,
+        "na": NOT_ANSWERED,
+        "-": NOT_ANSWERED,
+        "": NOT_ANSWERED,
+    },
+    "q16": {
+        "latest": "latest",
+        "latest stable": "latest",
+        "unstable": "unstable",
+        "nixpkgs-unstable": "unstable",
+        "master": "unstable",
+        "lix": "Lix",
+    },
+}
+
+
+def _clean(text: pl.Expr) -> pl.Expr:
+    # runs of whitespace collapsed, and trailing punctuation stripped
+    return text.str.replace_all(r"\s+", " ").str.strip_chars(" .!")
+
+
+def _fold(text: str) -> str:
+    # the same cleaning and case folding as the answers, for the synonym keys
+    return " ".join(text.split()).strip(" .!").lower()
+
+
+def count_text_answers(
+    questions: Iterable[QuestionPlan],
+    df: pl.LazyFrame,
+    synonyms: Mapping[str, Mapping[str, str]] = SYNONYMS,
+    version_questions: Iterable[str] = VERSION_QUESTIONS,
+) -> dict[str, list[dict]]:
+    """Count the answers of text questions, as `{"choice", "count"}` records.
+
+    All text columns are stacked and normalized at once with polars string
+    expressions: whitespace cleanup, case folding, the `synonyms` of the question
+    and, for `version_questions`, the major.minor version found in the answer.
+    Answers with the same normalized form are counted together, under their most
+    frequent spelling (or their synonym, or their version).
+    """
+    questions = [q for q in questions if q.type == "text" and q.column_ids]
+    if not questions:
+        return {}
+    question_ids = {q.column_ids[0]: q.id for q in questions}
+    synonym_table = pl.DataFrame(
+        [
+            {"question": question.id, "key": _fold(answer), "synonym": choice}
+            for question in questions
+            for scope in ("*", question.id)
+            for answer, choice in synonyms.get(scope, {}).items()
+        ],
+        schema={"question": pl.String, "key": pl.String, "synonym": pl.String},
+    ).unique(["question", "key"], keep="last", maintain_order=True)
+
+    counts = (
+        df.select(pl.col(question_ids).cast(pl.String))
+        .unpivot(variable_name="question", value_name="answer")
+        .filter(pl.col("answer") != NOT_ANSWERED)
+        .select(
+            pl.col("question").replace_strict(question_ids),
+            spelling=_clean(pl.col("answer")),
+        )
+        .with_columns(key=pl.col("spelling").str.to_lowercase())
+        .join(synonym_table.lazy(), on=["question", "key"], how="left")
+        .with_columns(
+            fixed=pl.coalesce(
+                "synonym",
+                pl.when(pl.col("question").is_in(list(version_questions))).then(
+                    pl.col("key").str.extract(r"(\d+\.\d+)", 1)
+                ),
+            )
+        )
+        .filter(pl.col("fixed").fill_null("") != NOT_ANSWERED)
+        .group_by("question", pl.coalesce("fixed", "key").alias("key"))
+        .agg(
+            pl.len().alias("count"),
+            pl.col("fixed").drop_nulls().first(),
+            pl.col("spelling").mode().sort().first(),
+        )
+        .select(
+            "question",
+            "count",
+            choice=pl.coalesce("fixed", "spelling"),
+        )
+        .sort("count", "choice", descending=[True, False])
+        .collect()
+    )
+    by_question = counts.partition_by("question", as_dict=True, include_key=False)
+    return {
+        question.id: by_question.get((question.id,), counts.clear())
+        .select("choice", "count")
+        .to_dicts()
+        for question in questions
+    }
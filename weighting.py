@@ -0,0 +1,188 @@
+import json
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from survey_plan import SurveyPlan
+
+# the column holding the weight of each respondent in a weighted frame
+WEIGHT_COLUMN = "weight"
+# single questions whose known population shares the respondents are weighted
+# to: region, age and years of Nix experience
+WEIGHTING_QUESTIONS = ("q01", "q02", "q08")
+# raking stops once every weighted margin is within this relative distance of its
+# target, or after this many rounds
+RAKING_TOLERANCE = 1e-6
+RAKING_MAX_ITERATIONS = 100
+
+
+def read_targets(path: Path | str) -> dict[str, dict[str, float]]:
+    # a JSON object of the population shares of the choices of each weighting
+    # question: {"q02": {"18-24 years old": 0.2, "25-34 years old": 0.4, ...}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def weighted_len(weight: str | None = None) -> pl.Expr:
+    # the respondents of a group, or the sum of their weights
+    return pl.len() if weight is None else pl.sum(weight)
+
+
+def design_effects(
+    df: pl.LazyFrame,
+    weight: str = WEIGHT_COLUMN,
+    by: str | None = None,
+) -> dict[str | None, float]:
+    # Kish's design effect of the weights, n * sum(w^2) / sum(w)^2, for each value
+    # of the `by` column or for all respondents (None): how many respondents a
+    # weighted one is worth the variance of
+    effect = (
+        pl.len() * pl.col(weight).pow(2).sum() / pl.col(weight).sum().pow(2)
+    ).alias("design_effect")
+    if by is None:
+        return {None: df.select(effect).collect().item()}
+    return dict(df.group_by(by).agg(effect).collect().iter_rows())
+
+
+def rake(
+    codes: np.ndarray,
+    respondents: np.ndarray,
+    targets: list[np.ndarray],
+    groups: np.ndarray | None = None,
+) -> tuple[np.ndarray, int, float]:
+    """Iterative proportional fitting of the weights of cells of respondents.
+
+    `codes` holds the level of each cell (row) on each margin (column), and
+    `respondents` the number of respondents in it. `targets[j]` holds the shares
+    of the levels of margin `j`, NaN for levels left at their weighted share.
+    Each round scales the weights so that each margin in turn matches its
+    targets, with one `bincount` per margin over all cells, and each of the
+    `groups` of cells (e.g. editions) is raked to the targets separately.
+    Returns the weight of a respondent of each cell, the number of rounds and
+    the largest relative distance to a target left.
+    """
+    if groups is None:
+        groups = np.zeros(len(respondents), dtype=np.int64)
+    n_groups = int(groups.max(initial=-1)) + 1
+    group_respondents = np.bincount(groups, respondents, minlength=n_groups)
+    weights = np.ones(len(respondents))
+    distance = np.inf
+    rounds = 0
+    while rounds < RAKING_MAX_ITERATIONS and distance > RAKING_TOLERANCE:
+        rounds += 1
+        distance = 0.0
+        for margin, shares in enumerate(targets):
+            levels = len(shares)
+            targeted = ~np.isnan(shares)
+            cells = groups * levels + codes[:, margin]
+            totals = np.bincount(
+                cells, respondents * weights, minlength=n_groups * levels
+            ).reshape(n_groups, levels)
+            # targeted levels share what the untargeted ones leave
+            left = group_respondents - totals[:, ~targeted].sum(axis=1)
+            goals = shares[targeted] / shares[targeted].sum() * left[:, None]
+            factors = np.ones((n_groups, levels))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                factors[:, targeted] = np.where(
+                    totals[:, targeted] > 0, goals / totals[:, targeted], 1.0
+                )
+                distance = max(
+                    distance,
+                    float(
+                        np.nanmax(
+                            np.abs(totals[:, targeted] - goals) / goals,
+                            initial=0.0,
+                        )
+                    ),
+                )
+            weights *= factors.ravel()[cells]
+    return weights, rounds, distance
+
+
+def add_weights(
+    plan: SurveyPlan,
+    df: pl.LazyFrame,
+    targets: Mapping[str, Mapping[str, float]],
+    by: str | None = None,
+) -> pl.LazyFrame:
+    """Add the raking weight of each respondent to `df`, as a `weight` column.
+
+    The weights make the weighted shares of the choices of each question of
+    `targets` match its population shares (see `read_targets`); choices without
+    a target, such as "Not answered", keep their weighted share. They only
+    depend on the answers to these questions, so respondents are counted by
+    combination of answers in one pass, the cells are raked with `rake`, and
+    their weights are joined back. The weights sum to the number of
+    respondents, of each value of the `by` column when given.
+    """
+    questions = list(targets)
+    for question_id in questions:
+        question = plan.questions.get(question_id)
+        if question is None or question.type != "single":
+            raise ValueError(f"{question_id} is not a single question")
+        unknown = set(targets[question_id]) - set(question.choices)
+        if unknown:
+            raise ValueError(
+                f"Not choices of {question_id}: {', '.join(map(repr, unknown))}"
+            )
+    keys = [*([] if by is None else [by]), *questions]
+    cells = df.group_by(keys).agg(pl.len().alias("respondents")).collect()
+
+    choices = [plan.questions[question_id].choices for question_id in questions]
+    codes = cells.select(
+        pl.col(question_id).cast(pl.Enum(question_choices)).to_physical()
+        for question_id, question_choices in zip(questions, choices)
+    ).to_numpy()
+    groups = (
+        None
+        if by is None
+        else (cells[by].cast(pl.String).rank("dense").cast(pl.Int64) - 1).to_numpy()
+    )
+    shares = [
+        np.array([targets[question_id].get(c, np.nan) for c in question_choices])
+        for question_id, question_choices in zip(questions, choices)
+    ]
+    # a targeted choice nobody picked (in some edition) cannot be weighted up to
+    # its share
+    respondents = cells["respondents"].to_numpy()
+    group_codes = (
+        np.zeros(len(respondents), dtype=np.int64) if groups is None else groups
+    )
+    for margin, (question_id, question_shares) in enumerate(zip(questions, shares)):
+        levels = len(question_shares)
+        present = np.bincount(
+            group_codes * levels + codes[:, margin],
+            respondents,
+            minlength=(int(group_codes.max(initial=0)) + 1) * levels,
+        ).reshape(-1, levels)
+        missing = [
+            choice
+            for choice, share, count in zip(
+                choices[margin], question_shares, present.min(axis=0)
+            )
+            if share > 0 and count == 0
+        ]
+        if missing:
+            raise ValueError(
+                f"No respondent to weight for {question_id}: "
+                + ", ".join(map(repr, missing))
+            )
+
+    weights, rounds, distance = rake(codes, respondents, shares, groups)
+    if distance > RAKING_TOLERANCE:
+        print(f"raking did not converge: margins within {distance:.1e} of targets")
+    # Kish's effective sample size: how many unweighted respondents the weighted
+    # ones are worth
+    effective = (respondents * weights).sum() ** 2 / (respondents * weights**2).sum()
+    print(
+        f"raked {respondents.sum()} respondents over {', '.join(questions)} in "
+        f"{rounds} rounds: weights {weights.min():.2f} to {weights.max():.2f}, "
+        f"effective sample size {effective:.0f}"
+    )
+    return df.join(
+        cells.select(*keys, pl.Series(WEIGHT_COLUMN, weights)).lazy(),
+        on=keys,
+        how="left",
+    )